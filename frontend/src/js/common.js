@@ -359,12 +359,24 @@ $(document).ready(function () {
             $this.after('<div class="select-styled"></div>');
 
             var $styledSelect = $this.next("div.select-styled");
+            var isMultiple = $this.prop("multiple");
 
-            var $selectedOption = $this.children("option:selected").length
-                ? $this.children("option:selected")
-                : $this.children("option").eq(0);
+            // Для множинного вибору перша (порожня) опція — це плейсхолдер
+            function selectedText() {
+                var $selected = $this.children("option:selected").filter(function () {
+                    return !isMultiple || $(this).val() !== "";
+                });
 
-            $styledSelect.text($selectedOption.text());
+                if (!$selected.length) {
+                    return $this.children("option").eq(0).text();
+                }
+
+                return $selected.map(function () {
+                    return $(this).text();
+                }).get().join(", ");
+            }
+
+            $styledSelect.text(selectedText());
 
             var $list = $("<ul />", {
                 class: "select-options",
@@ -391,8 +403,24 @@ $(document).ready(function () {
 
             $listItems.click(function (e) {
                 e.stopPropagation();
-                $styledSelect.text($(this).text()).removeClass("active");
-                $this.val($(this).attr("rel"));
+                var value = $(this).attr("rel");
+
+                if (isMultiple) {
+                    // Клік перемикає опцію, плейсхолдер знімає весь вибір
+                    var $option = $this.children("option").filter(function () {
+                        return $(this).val() === value;
+                    });
+
+                    if (value === "") {
+                        $this.children("option").prop("selected", false);
+                    } else {
+                        $option.prop("selected", !$option.prop("selected"));
+                    }
+                } else {
+                    $this.val(value);
+                }
+
+                $styledSelect.text(selectedText()).removeClass("active");
 
                 // КРИТИЧНО для HTMX: тригеримо подію change, щоб HTMX побачив зміну
                 $this.get(0).dispatchEvent(new Event('change', {bubbles: true}));
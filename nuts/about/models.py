@@ -11,18 +11,22 @@ from wagtail.images.models import Image
 from wagtailmedia.blocks import VideoChooserBlock
 
 from core.blocks import VideoJumbotronBlock, ImageJumbotronBlock
+from core.pages import CachedPageMixin, get_singleton_page
 
 from gallery.models import GalleryPage
 from news.models import NewsIndexPage, NewsDetailPage
 
 
-class AboutPage(Page):
+class AboutPage(CachedPageMixin, Page):
     template = "about.html"
 
     parent_page_types = ['home.HomePage']
     subpage_types = []
     max_count = 1
 
+    # Shows the latest news.
+    page_cache_dependencies = ('news.NewsDetailPage',)
+
     description = models.TextField(blank=True)
 
     hero = StreamField(
@@ -77,8 +81,8 @@ class AboutPage(Page):
     def get_context(self, request, *args, **kwargs):
         context = super().get_context(request)
 
-        context["gallery_page"] = GalleryPage.objects.live().first()
-        context["news_page"] = NewsIndexPage.objects.live().first()
+        context["gallery_page"] = get_singleton_page(GalleryPage)
+        context["news_page"] = get_singleton_page(NewsIndexPage)
         context["news_list"] = NewsDetailPage.objects.live().order_by('-publication_date')[:3]
 
         return context
@@ -1,12 +1,14 @@
 from django.contrib import messages
 from django.shortcuts import redirect
 
+from core.pages import get_singleton_page
+
 from auth.models import LoginPage
 
 
 class CustomerProfileRequiredMixin:
     def serve(self, request, *args, **kwargs):
-        login_page = LoginPage.objects.live().public().first()
+        login_page = get_singleton_page(LoginPage)
         login_url = login_page.get_url(request)
 
         if any([
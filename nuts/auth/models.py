@@ -8,6 +8,8 @@ from wagtail.models import Page
 from wagtail.fields import RichTextField
 from wagtail.admin.panels import FieldPanel
 
+from core.pages import get_singleton_page
+
 from auth.forms import (
     IndividualRegistrationForm,
     BusinessRegistrationForm,
@@ -30,7 +32,7 @@ class RegisterPage(Page):
 
         context["individual_registration_form"] = IndividualRegistrationForm()
         context["business_registration_form"] = BusinessRegistrationForm()
-        context["terms_page"] = TermsOfUsePage.objects.live().public().first()
+        context["terms_page"] = get_singleton_page(TermsOfUsePage)
 
         return context
 
@@ -49,8 +51,8 @@ class LoginPage(Page):
         context = super().get_context(request)
 
         context["customer_login_form"] = CustomerLoginForm()
-        context["forgot_page"] = ForgotPasswordPage.objects.live().public().first()
-        context["registration_page"] = RegisterPage.objects.live().public().first()
+        context["forgot_page"] = get_singleton_page(ForgotPasswordPage)
+        context["registration_page"] = get_singleton_page(RegisterPage)
 
         return context
 
@@ -111,7 +113,7 @@ class RecoverPasswordPage(Page):
         uidb64 = request.GET.get('uid')
         token = request.GET.get('token')
 
-        forgot_page = ForgotPasswordPage.objects.live().public().first()
+        forgot_page = get_singleton_page(ForgotPasswordPage)
         forgot_url = forgot_page.get_url(request)
 
         if not uidb64 or not token:
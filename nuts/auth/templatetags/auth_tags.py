@@ -1,5 +1,7 @@
 from django import template
 
+from core.pages import get_singleton_page
+
 from auth.models import (
     RegisterPage,
     LoginPage
@@ -14,7 +16,7 @@ register = template.Library()
 def auth_links(context):
     return {
         'request': context.get('request'),
-        'register_page': RegisterPage.objects.live().first(),
-        'login_page': LoginPage.objects.live().first(),
-        'profile_page': ProfilePage.objects.live().first(),
+        'register_page': get_singleton_page(RegisterPage),
+        'login_page': get_singleton_page(LoginPage),
+        'profile_page': get_singleton_page(ProfilePage),
     }
@@ -11,6 +11,8 @@ from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.models import User
 from django.shortcuts import redirect
 
+from core.pages import get_singleton_page
+
 from auth.forms import (
     IndividualRegistrationForm,
     BusinessRegistrationForm,
@@ -44,10 +46,10 @@ logger = logging.getLogger(__name__)
 
 class IndividualRegistrationView(View):
     def post(self, request, *args, **kwargs):
-        register_page = RegisterPage.objects.live().public().first()
+        register_page = get_singleton_page(RegisterPage)
         register_url = register_page.get_url(request)
 
-        home_page = HomePage.objects.live().public().first()
+        home_page = get_singleton_page(HomePage)
         home_url = home_page.get_url(request)
 
         form = IndividualRegistrationForm(request.POST, request.FILES)
@@ -104,10 +106,10 @@ class IndividualRegistrationView(View):
 
 class BusinessRegistrationView(View):
     def post(self, request, *args, **kwargs):
-        register_page = RegisterPage.objects.live().public().first()
+        register_page = get_singleton_page(RegisterPage)
         register_url = register_page.get_url(request) if register_page else '/'
 
-        home_page = HomePage.objects.live().public().first()
+        home_page = get_singleton_page(HomePage)
         home_url = home_page.get_url(request) if home_page else '/'
 
         form = BusinessRegistrationForm(request.POST, request.FILES)
@@ -197,10 +199,10 @@ class BusinessRegistrationView(View):
 
 class CustomerLoginView(View):
     def post(self, request, *args, **kwargs):
-        login_page = LoginPage.objects.live().public().first()
+        login_page = get_singleton_page(LoginPage)
         login_url = login_page.get_url(request)
 
-        home_page = HomePage.objects.live().public().first()
+        home_page = get_singleton_page(HomePage)
         home_url = home_page.get_url(request)
 
         form = CustomerLoginForm(request.POST)
@@ -237,10 +239,10 @@ class CustomerLoginView(View):
 
 class CustomerForgotPasswordView(View):
     def post(self, request, *args, **kwargs):
-        forgot_password_page = ForgotPasswordPage.objects.live().public().first()
+        forgot_password_page = get_singleton_page(ForgotPasswordPage)
         forgot_url = forgot_password_page.get_url(request)
 
-        recover_password_page = RecoverPasswordPage.objects.live().public().first()
+        recover_password_page = get_singleton_page(RecoverPasswordPage)
         recover_password_url = recover_password_page.get_url(request)
 
         form = CustomerForgotPasswordForm(request.POST)
@@ -283,7 +285,7 @@ class CustomerResetPasswordView(View):
         uidb64 = request.GET.get('uid')
         token = request.GET.get('token')
 
-        login_page = LoginPage.objects.live().public().first()
+        login_page = get_singleton_page(LoginPage)
         login_url = login_page.get_url(request)
         referer_url = request.META.get('HTTP_REFERER')
 
@@ -317,7 +319,7 @@ class CustomerResetPasswordView(View):
 
 class CustomerLogoutView(View):
     def post(self, request, *args, **kwargs):
-        login_page = LoginPage.objects.live().public().first()
+        login_page = get_singleton_page(LoginPage)
         login_url = login_page.get_url(request)
 
         logout(request)
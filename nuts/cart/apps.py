@@ -3,4 +3,7 @@ from django.apps import AppConfig
 
 class CartConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'cart'
\ No newline at end of file
+    name = 'cart'
+
+    def ready(self):
+        import cart.signals  # noqa: F401
@@ -1,12 +1,15 @@
-from cart.models import Cart, CartPage
+from django.utils.functional import SimpleLazyObject
 
+from core.pages import get_singleton_page
 
-def cart_processor(request):
-    cart = Cart.objects.get_cart_with_totals(request)
-    cart_page = CartPage.objects.live().first()
+from cart.models import CartPage
+from cart.utils import get_request_cart
 
 
+def cart_processor(request):
+    # Both values are resolved only when a template reads them, so pages
+    # that never touch the cart don't pay for its queries.
     return {
-        'cart': cart,
-        'cart_page': cart_page
-    }
\ No newline at end of file
+        'cart': SimpleLazyObject(lambda: get_request_cart(request)),
+        'cart_page': SimpleLazyObject(lambda: get_singleton_page(CartPage))
+    }
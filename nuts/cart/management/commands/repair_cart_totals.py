@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Max, Min
+
+from cart.models import Cart
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает сохранённые суммы корзин и исправляет расхождения с товарами'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--dry-run', action='store_true', help='Только показать расхождения, ничего не сохраняя')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+
+        bounds = Cart.objects.aggregate(start=Min('id'), end=Max('id'))
+
+        if bounds['start'] is None:
+            self.stdout.write('Корзин нет.')
+            return
+
+        drifted = 0
+
+        for start_id in range(bounds['start'], bounds['end'] + 1, batch_size):
+            cart_ids = Cart.objects.repair_totals(start_id, start_id + batch_size, dry_run=dry_run)
+            drifted += len(cart_ids)
+
+            if cart_ids and options['verbosity'] > 1:
+                self.stdout.write(f'Корзины с расхождениями: {", ".join(map(str, sorted(cart_ids)))}')
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING(f'Найдено корзин с расхождениями: {drifted}'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Исправлено корзин: {drifted}'))
@@ -1,5 +1,5 @@
-from django.db import models
-from django.db.models import F, Sum, DecimalField, ExpressionWrapper, Case, When
+from django.db import models, connections, transaction
+from django.db.models import F, DecimalField, ExpressionWrapper
 
 from django.apps import apps
 
@@ -11,12 +11,8 @@ class CartQuerySet(models.QuerySet):
         return self.prefetch_related(
             models.Prefetch(
                 'items',
-                queryset=CartItem.objects.annotate(
-                    actual_price=Case(
-                        When(product__discounted_price__isnull=False, then=F('product__discounted_price')),
-                        default=F('product__price'),
-                        output_field=DecimalField(),
-                    )
+                queryset=CartItem.objects.select_related('product').annotate(
+                    actual_price=F('product__actual_price')
                 ).annotate(
                     item_total=ExpressionWrapper(
                         F('actual_price') * F('quantity'),
@@ -24,16 +20,6 @@ class CartQuerySet(models.QuerySet):
                     )
                 )
             )
-        ).annotate(
-            cart_total=Sum(
-                Case(
-                    When(items__product__discounted_price__isnull=False,
-                         then=F('items__product__discounted_price') * F('items__quantity')),
-                    default=F('items__product__price') * F('items__quantity'),
-                    output_field=DecimalField(),
-                )
-            ),
-            cart_items_count=Sum('items__quantity')
         )
 
     def for_user_or_session(self, request):
@@ -52,4 +38,184 @@ class CartManager(models.Manager):
         return CartQuerySet(self.model, using=self._db)
 
     def get_cart_with_totals(self, request):
-        return self.get_queryset().for_user_or_session(request).with_totals().first()
\ No newline at end of file
+        from cart.storage import get_cart_storage
+
+        return get_cart_storage().get_cart(request)
+
+    def _update_totals(self, where, params, touch=True, only_drifted=False):
+        CartItem = apps.get_model('cart', 'CartItem')
+        Product = apps.get_model('products', 'Product')
+        table = self.model._meta.db_table
+
+        touch_sql = ", updated_at = NOW()" if touch else ""
+        drift_sql = (
+            f" AND ({table}.total_amount, {table}.items_count)"
+            " IS DISTINCT FROM (totals.total_amount, totals.items_count)"
+        ) if only_drifted else ""
+
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(
+                f"""
+                UPDATE {table}
+                SET total_amount = totals.total_amount, items_count = totals.items_count{touch_sql}
+                FROM (
+                    SELECT
+                        cart.id AS cart_id,
+                        COALESCE(SUM(item.quantity * product.actual_price), 0) AS total_amount,
+                        COALESCE(SUM(item.quantity), 0) AS items_count
+                    FROM {table} cart
+                    LEFT JOIN {CartItem._meta.db_table} item ON item.cart_id = cart.id
+                    LEFT JOIN {Product._meta.db_table} product ON product.id = item.product_id
+                    WHERE {where}
+                    GROUP BY cart.id
+                ) totals
+                WHERE {table}.id = totals.cart_id{drift_sql}
+                RETURNING {table}.id, {table}.total_amount, {table}.items_count
+                """,
+                params
+            )
+            return {cart_id: (total_amount, items_count) for cart_id, total_amount, items_count in cursor.fetchall()}
+
+    def refresh_totals(self, cart_ids):
+        """
+        Recomputes the stored totals of the given carts in one statement.
+        Cart mutation paths call it inside their transaction.
+        Returns {cart_id: (total_amount, items_count)}.
+        """
+        return self._update_totals("cart.id = ANY(%s)", [list(cart_ids)])
+
+    def refresh_totals_for_products(self, product_ids):
+        # Price changes don't count as cart activity, so updated_at is left alone.
+        CartItem = apps.get_model('cart', 'CartItem')
+
+        return self._update_totals(
+            f"cart.is_active AND cart.id IN (SELECT cart_id FROM {CartItem._meta.db_table} WHERE product_id = ANY(%s))",
+            [list(product_ids)],
+            touch=False
+        )
+
+    def repair_totals(self, start_id, end_id, dry_run=False):
+        """
+        Fixes stored totals that drifted from the items, for carts with ids in
+        [start_id, end_id). Returns the ids of the drifted carts.
+        """
+        with transaction.atomic(using=self.db):
+            drifted = self._update_totals(
+                "cart.id >= %s AND cart.id < %s", [start_id, end_id], touch=False, only_drifted=True
+            )
+
+            if dry_run:
+                transaction.set_rollback(True, using=self.db)
+
+        return list(drifted)
+
+    def prune_stale(self, cutoff, batch_size):
+        """
+        Deletes up to batch_size abandoned carts (anonymous or inactive, not
+        touched since cutoff) together with their items in one statement,
+        oldest first. Rows locked by a running request are skipped, not
+        waited for. Returns (carts_deleted, items_deleted).
+        """
+        CartItem = apps.get_model('cart', 'CartItem')
+        table = self.model._meta.db_table
+
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(
+                f"""
+                WITH stale AS (
+                    SELECT id FROM {table}
+                    WHERE (customer_id IS NULL OR NOT is_active) AND updated_at < %s
+                    ORDER BY updated_at
+                    LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                ),
+                deleted_items AS (
+                    DELETE FROM {CartItem._meta.db_table} WHERE cart_id IN (SELECT id FROM stale) RETURNING 1
+                ),
+                deleted_carts AS (
+                    DELETE FROM {table} WHERE id IN (SELECT id FROM stale) RETURNING 1
+                )
+                SELECT (SELECT COUNT(*) FROM deleted_carts), (SELECT COUNT(*) FROM deleted_items)
+                """,
+                [cutoff, batch_size]
+            )
+            return cursor.fetchone()
+
+
+class CartItemManager(models.Manager):
+    def upsert_quantities(self, cart_id, quantities):
+        """
+        Adds quantities ({product_id: quantity}) to a cart in a single
+        INSERT ... ON CONFLICT statement, skipping products that do not exist.
+        Returns (item_id, product_id, new_quantity) rows.
+        """
+        Product = apps.get_model('products', 'Product')
+        table = self.model._meta.db_table
+
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {table} (cart_id, product_id, quantity, created_at)
+                SELECT %s, product.id, added.quantity, NOW()
+                FROM UNNEST(%s::bigint[], %s::integer[]) AS added (product_id, quantity)
+                JOIN {Product._meta.db_table} product ON product.id = added.product_id
+                ON CONFLICT (cart_id, product_id)
+                DO UPDATE SET quantity = {table}.quantity + EXCLUDED.quantity
+                RETURNING id, product_id, quantity
+                """,
+                [cart_id, list(map(int, quantities.keys())), list(map(int, quantities.values()))]
+            )
+            return cursor.fetchall()
+
+    def upsert_quantity(self, cart_id, product_id, quantity=1):
+        """
+        Returns (item_id, new_quantity), or None when the product does not exist.
+        """
+        rows = self.upsert_quantities(cart_id, {product_id: quantity})
+
+        if not rows:
+            return None
+
+        item_id, _, new_quantity = rows[0]
+        return item_id, new_quantity
+
+    def merge_into(self, source_cart_id, target_cart_id):
+        """
+        Moves every item of the source cart into the target cart, summing
+        quantities of products present in both. The number of statements does
+        not depend on the size of either cart.
+        """
+        table = self.model._meta.db_table
+
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {table} (cart_id, product_id, quantity, created_at)
+                SELECT %s, product_id, quantity, created_at FROM {table} WHERE cart_id = %s
+                ON CONFLICT (cart_id, product_id)
+                DO UPDATE SET quantity = {table}.quantity + EXCLUDED.quantity
+                """,
+                [target_cart_id, source_cart_id]
+            )
+
+        self.filter(cart_id=source_cart_id).delete()
+
+    def increment_quantity(self, cart_id, item_id, delta):
+        """
+        Atomically changes an item's quantity by delta without letting it
+        drop below 1. Returns the new quantity, or None if nothing matched.
+        """
+        table = self.model._meta.db_table
+
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(
+                f"""
+                UPDATE {table} SET quantity = quantity + %s
+                WHERE id = %s AND cart_id = %s AND quantity + %s >= 1
+                RETURNING quantity
+                """,
+                [delta, item_id, cart_id, delta]
+            )
+            row = cursor.fetchone()
+
+        return row[0] if row else None
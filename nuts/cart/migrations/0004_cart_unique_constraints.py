@@ -0,0 +1,64 @@
+# Generated by Django 5.2.9 on 2026-10-18 18:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cart', '0003_cartpage'),
+        ('products', '0004_alter_product_weight'),
+        ('users', '0003_customerprofile_company_name'),
+    ]
+
+    operations = [
+        # Merge duplicate items into the oldest row before enforcing uniqueness.
+        migrations.RunSQL(
+            sql="""
+                WITH duplicates AS (
+                    SELECT cart_id, product_id, MIN(id) AS keep_id, SUM(quantity) AS quantity
+                    FROM cart_cartitem
+                    GROUP BY cart_id, product_id
+                    HAVING COUNT(*) > 1
+                ), merged AS (
+                    UPDATE cart_cartitem SET quantity = duplicates.quantity
+                    FROM duplicates
+                    WHERE cart_cartitem.id = duplicates.keep_id
+                )
+                DELETE FROM cart_cartitem
+                USING duplicates
+                WHERE cart_cartitem.cart_id = duplicates.cart_id
+                  AND cart_cartitem.product_id = duplicates.product_id
+                  AND cart_cartitem.id <> duplicates.keep_id;
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        # Keep only the newest active cart per customer and per session.
+        migrations.RunSQL(
+            sql="""
+                UPDATE cart_cart SET is_active = FALSE
+                WHERE is_active AND customer_id IS NOT NULL AND EXISTS (
+                    SELECT 1 FROM cart_cart newer
+                    WHERE newer.is_active AND newer.customer_id = cart_cart.customer_id AND newer.id > cart_cart.id
+                );
+                UPDATE cart_cart SET is_active = FALSE
+                WHERE is_active AND session_key IS NOT NULL AND EXISTS (
+                    SELECT 1 FROM cart_cart newer
+                    WHERE newer.is_active AND newer.session_key = cart_cart.session_key AND newer.id > cart_cart.id
+                );
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddConstraint(
+            model_name='cart',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_active', True)), fields=('customer',), name='cart_unique_active_customer'),
+        ),
+        migrations.AddConstraint(
+            model_name='cart',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_active', True)), fields=('session_key',), name='cart_unique_active_session'),
+        ),
+        migrations.AddConstraint(
+            model_name='cartitem',
+            constraint=models.UniqueConstraint(fields=('cart', 'product'), name='cart_item_unique_product'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.9 on 2026-10-18 18:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cart', '0004_cart_unique_constraints'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cart',
+            name='items_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='cart',
+            name='total_amount',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.RunSQL(
+            sql="""
+                UPDATE cart_cart
+                SET total_amount = totals.total_amount, items_count = totals.items_count
+                FROM (
+                    SELECT
+                        item.cart_id,
+                        SUM(item.quantity * COALESCE(product.discounted_price, product.price)) AS total_amount,
+                        SUM(item.quantity) AS items_count
+                    FROM cart_cartitem item
+                    JOIN products_product product ON product.id = item.product_id
+                    GROUP BY item.cart_id
+                ) totals
+                WHERE cart_cart.id = totals.cart_id;
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-18 18:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cart', '0005_cart_stored_totals'),
+        ('users', '0003_customerprofile_company_name'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cart',
+            index=models.Index(condition=models.Q(('customer__isnull', True), ('is_active', False), _connector='OR'), fields=['updated_at'], name='cart_abandoned_updated_idx'),
+        ),
+    ]
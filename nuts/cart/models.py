@@ -3,7 +3,7 @@ from django.core.validators import MinValueValidator
 
 from wagtail.models import Page
 
-from cart.managers import CartManager
+from cart.managers import CartManager, CartItemManager
 
 class CartPage(Page):
     parent_page_types = ['home.HomePage']
@@ -21,11 +21,36 @@ class Cart(models.Model):
     session_key = models.CharField(max_length=40, null=True, blank=True, db_index=True)
     customer = models.ForeignKey('users.CustomerProfile', on_delete=models.SET_NULL, null=True, blank=True)
     is_active = models.BooleanField(default=True)
+    # Maintained by the cart mutation paths (see CartManager.refresh_totals).
+    total_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    items_count = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     objects = CartManager()
 
+    class Meta:
+        indexes = [
+            # Drives the stale cart pruning task (cart.tasks.prune_stale_carts).
+            models.Index(
+                fields=['updated_at'],
+                condition=models.Q(customer__isnull=True) | models.Q(is_active=False),
+                name='cart_abandoned_updated_idx'
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['customer'],
+                condition=models.Q(is_active=True),
+                name='cart_unique_active_customer'
+            ),
+            models.UniqueConstraint(
+                fields=['session_key'],
+                condition=models.Q(is_active=True),
+                name='cart_unique_active_session'
+            ),
+        ]
+
 
 class CartItem(models.Model):
     id = models.BigAutoField(primary_key=True)
@@ -34,5 +59,10 @@ class CartItem(models.Model):
     quantity = models.PositiveIntegerField(validators=[MinValueValidator(1)])
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = CartItemManager()
+
     class Meta:
         ordering = ['created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['cart', 'product'], name='cart_item_unique_product'),
+        ]
@@ -0,0 +1,20 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from products.models import Product
+from products.signals import products_imported
+
+from cart.models import Cart
+
+
+@receiver(post_save, sender=Product)
+def refresh_cart_totals_on_price_change(sender, instance, created, **kwargs):
+    if created:
+        return
+
+    Cart.objects.refresh_totals_for_products([instance.pk])
+
+
+@receiver(products_imported)
+def refresh_cart_totals_on_import(sender, product_ids, **kwargs):
+    Cart.objects.refresh_totals_for_products(product_ids)
@@ -0,0 +1,282 @@
+from collections import namedtuple
+from functools import lru_cache
+
+import redis
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from products.models import Product
+
+from cart.models import Cart, CartItem
+
+# Result of a cart mutation: the touched item and the cart totals after it.
+CartItemChange = namedtuple('CartItemChange', ['item_id', 'quantity', 'total_amount', 'items_count'])
+
+
+class DatabaseCartStorage:
+    """
+    Keeps every cart in Postgres as Cart/CartItem rows.
+    """
+
+    def get_cart(self, request):
+        return Cart.objects.get_queryset().for_user_or_session(request).with_totals().first()
+
+    def get_or_create_cart(self, request):
+        if request.user.is_authenticated and hasattr(request.user, "customer_profile"):
+            cart, _ = Cart.objects.get_or_create(
+                customer=request.user.customer_profile,
+                is_active=True,
+            )
+            return cart
+
+        if not request.session.session_key:
+            request.session.create()
+
+        cart, _ = Cart.objects.get_or_create(
+            session_key=request.session.session_key,
+            is_active=True
+        )
+        return cart
+
+    def get_cart_id(self, request):
+        return Cart.objects.get_queryset().for_user_or_session(request).values_list('id', flat=True).first()
+
+    def get_items_count(self, request):
+        return Cart.objects.get_queryset().for_user_or_session(request).values_list('items_count', flat=True).first() or 0
+
+    def get_cart_fingerprint(self, request):
+        # Changes whenever the header counter or the cart popup would.
+        row = Cart.objects.get_queryset().for_user_or_session(request).values_list(
+            'id', 'updated_at', 'total_amount', 'items_count'
+        ).first()
+        return ':'.join(map(str, row)) if row else ''
+
+    def get_change(self, cart_id, item_id, quantity):
+        total_amount, items_count = Cart.objects.refresh_totals([cart_id])[cart_id]
+        return CartItemChange(item_id, quantity, total_amount, items_count)
+
+    def add_item(self, request, product_id):
+        cart = self.get_or_create_cart(request)
+
+        with transaction.atomic():
+            row = CartItem.objects.upsert_quantity(cart.pk, product_id)
+
+            if row is None:
+                raise Product.DoesNotExist
+
+            item_id, quantity = row
+            return self.get_change(cart.pk, item_id, quantity)
+
+    def update_item(self, request, item_id, action):
+        cart_id = self.get_cart_id(request)
+
+        if cart_id is None:
+            return None
+
+        quantity = 0
+
+        with transaction.atomic():
+            if action == 'plus':
+                quantity = CartItem.objects.increment_quantity(cart_id, item_id, 1) or 0
+
+            elif action == 'minus':
+                quantity = CartItem.objects.increment_quantity(cart_id, item_id, -1)
+
+                if quantity is None:
+                    CartItem.objects.filter(id=item_id, cart_id=cart_id).delete()
+                    quantity = 0
+
+            elif action == 'remove':
+                CartItem.objects.filter(id=item_id, cart_id=cart_id).delete()
+
+            return self.get_change(cart_id, item_id, quantity)
+
+    def merge(self, customer_profile, anonymous_session_key):
+        with transaction.atomic():
+            anonymous_cart_id = Cart.objects.filter(
+                session_key=anonymous_session_key,
+                is_active=True
+            ).values_list('id', flat=True).first()
+
+            if not anonymous_cart_id:
+                return
+
+            user_cart_id = Cart.objects.filter(
+                customer=customer_profile,
+                is_active=True
+            ).values_list('id', flat=True).first()
+
+            if not user_cart_id:
+                Cart.objects.filter(pk=anonymous_cart_id).update(customer=customer_profile, session_key=None)
+                return
+
+            CartItem.objects.merge_into(anonymous_cart_id, user_cart_id)
+            Cart.objects.filter(pk=anonymous_cart_id).delete()
+            Cart.objects.refresh_totals([user_cart_id])
+
+
+class SessionCartItems(list):
+    # Mimics the related manager API used by templates and views (cart.items.all).
+    def all(self):
+        return self
+
+
+class SessionCartItem:
+    def __init__(self, product, quantity):
+        # Anonymous items are addressed by product id in cart:update-item.
+        self.id = product.pk
+        self.product = product
+        self.quantity = quantity
+        self.actual_price = product.actual_price
+        self.item_total = product.actual_price * quantity
+
+
+class SessionCart:
+    def __init__(self, session_key, items):
+        self.session_key = session_key
+        self.items = SessionCartItems(items)
+        self.total_amount = sum(item.item_total for item in items)
+        self.items_count = sum(item.quantity for item in items)
+
+
+class RedisCartStorage(DatabaseCartStorage):
+    """
+    Keeps anonymous carts as Redis hashes (product id -> quantity) and only
+    writes them to Cart/CartItem when the visitor logs in or registers.
+    Checkout requires a customer profile, so every cart that reaches an order
+    has been persisted by then. Customer carts stay in the database.
+    """
+
+    key_prefix = 'cart:session:'
+
+    def __init__(self):
+        self.redis = redis.Redis.from_url(settings.CART_REDIS_URL, decode_responses=True)
+
+    def get_key(self, session_key):
+        return f'{self.key_prefix}{session_key}'
+
+    def is_anonymous(self, request):
+        return not (request.user.is_authenticated and hasattr(request.user, "customer_profile"))
+
+    def build_cart(self, session_key, quantities):
+        products = Product.objects.filter(id__in=quantities.keys()).order_by('id')
+
+        items = [SessionCartItem(product, int(quantities[str(product.pk)])) for product in products]
+
+        return SessionCart(session_key, items)
+
+    def get_cart(self, request):
+        if not self.is_anonymous(request):
+            return super().get_cart(request)
+
+        session_key = request.session.session_key
+
+        if not session_key:
+            return None
+
+        quantities = self.redis.hgetall(self.get_key(session_key))
+
+        if not quantities:
+            return None
+
+        return self.build_cart(session_key, quantities)
+
+    def get_items_count(self, request):
+        if not self.is_anonymous(request):
+            return super().get_items_count(request)
+
+        session_key = request.session.session_key
+
+        if not session_key:
+            return 0
+
+        return sum(map(int, self.redis.hvals(self.get_key(session_key))))
+
+    def get_cart_fingerprint(self, request):
+        if not self.is_anonymous(request):
+            return super().get_cart_fingerprint(request)
+
+        session_key = request.session.session_key
+
+        if not session_key:
+            return ''
+
+        return ','.join(f'{k}={v}' for k, v in sorted(self.redis.hgetall(self.get_key(session_key)).items()))
+
+    def add_item(self, request, product_id):
+        if not self.is_anonymous(request):
+            return super().add_item(request, product_id)
+
+        if not request.session.session_key:
+            request.session.create()
+
+        key = self.get_key(request.session.session_key)
+
+        with self.redis.pipeline() as pipeline:
+            pipeline.hincrby(key, product_id, 1)
+            pipeline.expire(key, settings.SESSION_COOKIE_AGE)
+            pipeline.hgetall(key)
+            quantity, _, quantities = pipeline.execute()
+
+        cart = self.build_cart(request.session.session_key, quantities)
+
+        if not any(item.id == product_id for item in cart.items):
+            self.redis.hdel(key, product_id)
+            raise Product.DoesNotExist
+
+        return CartItemChange(product_id, quantity, cart.total_amount, cart.items_count)
+
+    def update_item(self, request, item_id, action):
+        if not self.is_anonymous(request):
+            return super().update_item(request, item_id, action)
+
+        session_key = request.session.session_key
+
+        if not session_key:
+            return None
+
+        key = self.get_key(session_key)
+        quantity = 0
+
+        if action == 'plus':
+            if self.redis.hexists(key, item_id):
+                quantity = self.redis.hincrby(key, item_id, 1)
+
+        elif action == 'minus':
+            quantity = self.redis.hincrby(key, item_id, -1)
+
+            if quantity <= 0:
+                self.redis.hdel(key, item_id)
+                quantity = 0
+
+        elif action == 'remove':
+            self.redis.hdel(key, item_id)
+
+        self.redis.expire(key, settings.SESSION_COOKIE_AGE)
+
+        cart = self.build_cart(session_key, self.redis.hgetall(key))
+        return CartItemChange(item_id, quantity, cart.total_amount, cart.items_count)
+
+    def merge(self, customer_profile, anonymous_session_key):
+        # Carts created before switching backends still live in the database.
+        super().merge(customer_profile, anonymous_session_key)
+
+        key = self.get_key(anonymous_session_key)
+        quantities = self.redis.hgetall(key)
+
+        if not quantities:
+            return
+
+        with transaction.atomic():
+            user_cart, _ = Cart.objects.get_or_create(customer=customer_profile, is_active=True)
+            CartItem.objects.upsert_quantities(user_cart.pk, quantities)
+            Cart.objects.refresh_totals([user_cart.pk])
+
+        self.redis.delete(key)
+
+
+@lru_cache(maxsize=None)
+def get_cart_storage():
+    return import_string(settings.CART_STORAGE)()
@@ -0,0 +1,78 @@
+import logging
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.db import connection, transaction
+from django.utils import timezone
+
+from cart.models import Cart
+
+logger = logging.getLogger(__name__)
+
+DB_SESSION_ENGINES = (
+    'django.contrib.sessions.backends.db',
+    'django.contrib.sessions.backends.cached_db',
+)
+
+
+def prune_expired_sessions(batch_size):
+    table = Session._meta.db_table
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            DELETE FROM {table} WHERE session_key IN (
+                SELECT session_key FROM {table}
+                WHERE expire_date < NOW()
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            )
+            """,
+            [batch_size]
+        )
+        return cursor.rowcount
+
+
+@shared_task
+def prune_stale_carts():
+    """
+    Deletes abandoned carts (with their items) and expired DB sessions in
+    short batches, one transaction each, so no lock is held for long. Every
+    batch picks the oldest remaining rows, so a run stopped by
+    CART_PRUNE_MAX_BATCHES is simply continued by the next one.
+    """
+    batch_size = settings.CART_PRUNE_BATCH_SIZE
+    # A cart must not disappear while its session cookie is still valid.
+    cutoff = timezone.now() - max(
+        timedelta(days=settings.CART_PRUNE_AFTER_DAYS),
+        timedelta(seconds=settings.SESSION_COOKIE_AGE),
+    )
+
+    removed = {'carts': 0, 'cart_items': 0, 'sessions': 0}
+
+    for _ in range(settings.CART_PRUNE_MAX_BATCHES):
+        with transaction.atomic():
+            carts, items = Cart.objects.prune_stale(cutoff, batch_size)
+
+        removed['carts'] += carts
+        removed['cart_items'] += items
+
+        if carts < batch_size:
+            break
+
+    if settings.SESSION_ENGINE in DB_SESSION_ENGINES:
+        for _ in range(settings.CART_PRUNE_MAX_BATCHES):
+            with transaction.atomic():
+                sessions = prune_expired_sessions(batch_size)
+
+            removed['sessions'] += sessions
+
+            if sessions < batch_size:
+                break
+
+    logger.info(
+        "Pruned %(carts)s carts, %(cart_items)s cart items, %(sessions)s sessions", removed
+    )
+    return removed
@@ -1,3 +1,189 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from cart.models import Cart, CartItem
+from cart.tasks import prune_stale_carts
+from cart.utils import merge_carts
+
+from locations.models import Address, Country, Region
+
+from products.models import Product
+
+from users.models import CustomerProfile
+
+
+class MergeCartsTests(TestCase):
+    """
+    merge_carts must run a constant number of statements regardless of cart size.
+    """
+
+    CART_SIZES = (1, 50, 500)
+
+    @staticmethod
+    def make_customer_profile():
+        country = Country.objects.create(code="UA", name="Украина")
+        region = Region.objects.create(name="Одесская", country=country)
+
+        user = User.objects.create_user(username="customer", email="customer@example.com", password="secret-password")
+
+        return CustomerProfile.objects.create(
+            user=user,
+            contact_address=Address.objects.create(region=region, city="Одесса"),
+            full_name="Тестовый Покупатель",
+            phone="+38 (099) 123-45-67",
+        )
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer_profile = cls.make_customer_profile()
+
+        cls.products = Product.objects.bulk_create(
+            Product(
+                name=f"Орех {i}",
+                sku=f"NUT-{i}",
+                weight=100,
+                calories=600,
+                shelf_life_months=12,
+                ingredients="Орех",
+                price=Decimal("100.00"),
+            )
+            for i in range(max(cls.CART_SIZES))
+        )
+
+    def fill_carts(self, size):
+        anonymous_cart = Cart.objects.create(session_key=f"session-{size}")
+        user_cart = Cart.objects.create(customer=self.customer_profile)
+
+        CartItem.objects.bulk_create(
+            CartItem(cart=anonymous_cart, product=product, quantity=2)
+            for product in self.products[:size]
+        )
+        # Half of the anonymous items are already in the customer's cart.
+        CartItem.objects.bulk_create(
+            CartItem(cart=user_cart, product=product, quantity=1)
+            for product in self.products[:size:2]
+        )
+
+        return anonymous_cart, user_cart
+
+    def merge(self, session_key):
+        with CaptureQueriesContext(connection) as queries:
+            merge_carts(customer_profile=self.customer_profile, anonymous_session_key=session_key)
+
+        return len(queries)
+
+    def test_merge_into_existing_cart_query_count_is_constant(self):
+        query_counts = []
+
+        for size in self.CART_SIZES:
+            with self.subTest(size=size):
+                anonymous_cart, user_cart = self.fill_carts(size)
+
+                query_counts.append(self.merge(anonymous_cart.session_key))
+
+                self.assertFalse(Cart.objects.filter(pk=anonymous_cart.pk).exists())
+                self.assertEqual(user_cart.items.count(), size)
+                self.assertEqual(
+                    sum(user_cart.items.values_list('quantity', flat=True)),
+                    size * 2 + len(self.products[:size:2])
+                )
+
+                user_cart.refresh_from_db()
+                self.assertEqual(user_cart.items_count, size * 2 + len(self.products[:size:2]))
+                self.assertEqual(user_cart.total_amount, user_cart.items_count * Decimal("100.00"))
+
+                Cart.objects.all().delete()
+
+        self.assertEqual(len(set(query_counts)), 1, query_counts)
+
+    def test_merge_without_customer_cart_reassigns_anonymous_cart(self):
+        query_counts = []
+
+        for size in self.CART_SIZES:
+            with self.subTest(size=size):
+                anonymous_cart, user_cart = self.fill_carts(size)
+                user_cart.delete()
+
+                query_counts.append(self.merge(anonymous_cart.session_key))
+
+                anonymous_cart.refresh_from_db()
+                self.assertEqual(anonymous_cart.customer, self.customer_profile)
+                self.assertIsNone(anonymous_cart.session_key)
+
+                Cart.objects.all().delete()
+
+        self.assertEqual(len(set(query_counts)), 1, query_counts)
+
+
+class RepairCartTotalsTests(TestCase):
+    def test_repair_fixes_only_drifted_carts(self):
+        product = Product.objects.create(
+            name="Миндаль",
+            sku="ALMOND",
+            weight=100,
+            calories=600,
+            shelf_life_months=12,
+            ingredients="Миндаль",
+            price=Decimal("100.00"),
+            discounted_price=Decimal("80.00"),
+        )
+
+        consistent_cart = Cart.objects.create(session_key="consistent")
+        drifted_cart = Cart.objects.create(session_key="drifted")
+
+        for cart in (consistent_cart, drifted_cart):
+            CartItem.objects.create(cart=cart, product=product, quantity=3)
+
+        Cart.objects.refresh_totals([consistent_cart.pk, drifted_cart.pk])
+        Cart.objects.filter(pk=drifted_cart.pk).update(total_amount=0, items_count=0)
+
+        self.assertEqual(Cart.objects.repair_totals(0, drifted_cart.pk + 1, dry_run=True), [drifted_cart.pk])
+        self.assertEqual(Cart.objects.get(pk=drifted_cart.pk).items_count, 0)
+
+        call_command('repair_cart_totals', stdout=StringIO())
+
+        for cart in (consistent_cart, drifted_cart):
+            cart.refresh_from_db()
+            self.assertEqual(cart.items_count, 3)
+            self.assertEqual(cart.total_amount, Decimal("240.00"))
+
+
+class PruneStaleCartsTests(TestCase):
+    def test_prunes_only_abandoned_carts(self):
+        product = Product.objects.create(
+            name="Фундук",
+            sku="HAZELNUT",
+            weight=100,
+            calories=600,
+            shelf_life_months=12,
+            ingredients="Фундук",
+            price=Decimal("100.00"),
+        )
+        customer_profile = MergeCartsTests.make_customer_profile()
+
+        stale_anonymous = Cart.objects.create(session_key="stale")
+        stale_inactive = Cart.objects.create(customer=customer_profile, is_active=False)
+        stale_customer = Cart.objects.create(customer=customer_profile)
+        fresh_anonymous = Cart.objects.create(session_key="fresh")
+
+        for cart in (stale_anonymous, stale_inactive, stale_customer, fresh_anonymous):
+            CartItem.objects.create(cart=cart, product=product, quantity=1)
+
+        Cart.objects.exclude(pk=fresh_anonymous.pk).update(updated_at=timezone.now() - timedelta(days=365))
+
+        with self.settings(CART_PRUNE_BATCH_SIZE=1):
+            removed = prune_stale_carts()
 
-# Create your tests here.
+        self.assertEqual(removed['carts'], 2)
+        self.assertEqual(removed['cart_items'], 2)
+        self.assertQuerySetEqual(
+            Cart.objects.order_by('pk'), [stale_customer, fresh_anonymous]
+        )
@@ -3,6 +3,7 @@ from django.urls import path
 from cart.views import (
     CartAddItemView,
     CartUpdateItemView,
+    CartStateView,
     CartPopupView,
     CartCounterView,
     CartTableView
@@ -13,6 +14,7 @@ app_name = 'cart'
 urlpatterns = [
     path('add-item/<int:product_id>/', CartAddItemView.as_view(), name='add-item'),
     path('update-item/<int:item_id>/<str:action>', CartUpdateItemView.as_view(), name='update-item'),
+    path('state/', CartStateView.as_view(), name='state'),
     path('popup/', CartPopupView.as_view(), name='popup'),
     path('counter/', CartCounterView.as_view(), name='counter'),
     path('table/', CartTableView.as_view(), name='table')
@@ -1,41 +1,18 @@
-from django.db import transaction
-
 from cart.models import Cart
+from cart.storage import get_cart_storage
 
-def merge_carts(customer_profile, anonymous_session_key):
-    if not anonymous_session_key:
-        return
-
-    anonymous_cart = Cart.objects.filter(
-        session_key=anonymous_session_key,
-        is_active=True
-    ).first()
 
-    if not anonymous_cart:
-        return
-
-    user_cart = Cart.objects.filter(
-        customer=customer_profile,
-        is_active=True
-    ).first()
+def get_request_cart(request):
+    # Memoized on the request so the context processor and the view share
+    # a single evaluation of the cart query.
+    if not hasattr(request, '_cart_cache'):
+        request._cart_cache = Cart.objects.get_cart_with_totals(request)
 
-    with transaction.atomic():
-        if not user_cart:
-            anonymous_cart.customer = customer_profile
-            anonymous_cart.session_key = None
-            anonymous_cart.save()
-        else:
-            anonymous_items = anonymous_cart.items.all()
+    return request._cart_cache
 
-            for item in anonymous_items:
-                existing_item = user_cart.items.filter(product=item.product).first()
 
-                if existing_item:
-                    existing_item.quantity += item.quantity
-                    existing_item.save()
-                    item.delete()
-                else:
-                    item.cart = user_cart
-                    item.save()
+def merge_carts(customer_profile, anonymous_session_key):
+    if not anonymous_session_key:
+        return
 
-            anonymous_cart.delete()
\ No newline at end of file
+    get_cart_storage().merge(customer_profile, anonymous_session_key)
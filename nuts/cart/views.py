@@ -1,10 +1,18 @@
-from django.http import HttpResponse
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, Http404
+from django.utils.decorators import method_decorator
 from django.views import View
+from django.views.decorators.csrf import ensure_csrf_cookie
 from django.shortcuts import render
 
+from core.pages import get_singleton_page
+
 from products.models import Product
 
-from cart.models import Cart, CartItem
+from cart.storage import get_cart_storage
+from cart.utils import get_request_cart
 
 from shop.models import ShopPage
 
@@ -12,90 +20,93 @@ from auth.models import RegisterPage, LoginPage
 
 from orders.models import OrderCheckoutPage
 
+
+def get_cart_table_pages():
+    # The pages the cart table links to, from the page registry.
+    return {
+        "shop_page": get_singleton_page(ShopPage),
+        "login_page": get_singleton_page(LoginPage),
+        "register_page": get_singleton_page(RegisterPage),
+        "checkout_page": get_singleton_page(OrderCheckoutPage),
+    }
+
+
+def cart_state_response(request, change=None):
+    """
+    Renders the counter, the popup and, when the page asked for it with
+    the cart_table value, the cart table as hx-swap-oob fragments from a
+    single cart evaluation.
+    """
+    context = {"cart": get_request_cart(request)}
+
+    if 'cart_table' in request.POST or 'cart_table' in request.GET:
+        context["cart_table"] = True
+        context.update(get_cart_table_pages())
+
+    response = render(request, "includes/cart/state.html", context)
+
+    if change:
+        response['HX-Trigger'] = json.dumps({'cartUpdated': change._asdict()}, cls=DjangoJSONEncoder)
+
+    return response
+
+
+def cart_updated_response(request, change):
+    if request.headers.get('HX-Request'):
+        return cart_state_response(request, change)
+
+    # The new quantity and totals travel as the event detail, so listeners
+    # can use them without asking the server again.
+    detail = change._asdict() if change else {}
+
+    response = HttpResponse()
+    response['HX-Trigger'] = json.dumps({'cartUpdated': detail}, cls=DjangoJSONEncoder)
+    return response
+
+
 class CartAddItemView(View):
     def post(self, request, product_id):
-        product = Product.objects.get(id=product_id)
-
-        if request.user.is_authenticated and hasattr(request.user, "customer_profile"):
-            cart, _ = Cart.objects.get_or_create(
-                customer=request.user.customer_profile,
-                is_active=True,
-            )
-        else:
-            if not request.session.session_key:
-                request.session.create()
-            cart, _ = Cart.objects.get_or_create(
-                session_key=request.session.session_key,
-                is_active=True
-            )
-
-        item, created = CartItem.objects.get_or_create(cart=cart, product=product, defaults={'quantity': 1})
-
-        if not created:
-            item.quantity += 1
-            item.save()
-        else:
-            item.quantity = 1
-            item.save()
-
-        response = HttpResponse()
-        response['HX-Trigger'] = 'cartUpdated'
-        return response
+        try:
+            change = get_cart_storage().add_item(request, product_id)
+        except Product.DoesNotExist:
+            raise Http404("Product not found.")
+
+        return cart_updated_response(request, change)
 
 
 class CartUpdateItemView(View):
     def post(self, request, item_id, action):
-        item = CartItem.objects.get(id=item_id)
-
-        if action == 'plus':
-            item.quantity += 1
-            item.save()
+        change = get_cart_storage().update_item(request, item_id, action)
 
-        elif action == 'minus':
-            if item.quantity > 1:
-                item.quantity -= 1
-                item.save()
-            else:
-                item.delete()
+        return cart_updated_response(request, change)
 
-        elif action == 'remove':
-            item.delete()
 
-        response = HttpResponse()
-        response['HX-Trigger'] = 'cartUpdated'
-        return response
+class CartStateView(View):
+    def get(self, request):
+        return cart_state_response(request)
 
 
 class CartPopupView(View):
     def get(self, request):
-        cart = Cart.objects.get_cart_with_totals(request)
+        cart = get_request_cart(request)
         return render(request, "includes/cart/popup_content.html", {"cart": cart})
 
 
+# Loaded by every shared page copy, which carries no CSRF token, so that
+# HTMX can take the token from the cookie.
+@method_decorator(ensure_csrf_cookie, name="get")
 class CartCounterView(View):
     def get(self, request):
-        cart = Cart.objects.get_cart_with_totals(request)
-        count = getattr(cart, 'cart_items_count', 0) or 0
+        count = get_cart_storage().get_items_count(request)
         return HttpResponse(str(count))
 
 
 class CartTableView(View):
     def get(self, request):
-        cart = Cart.objects.get_cart_with_totals(request)
-
-        shop_page = ShopPage.objects.live().first()
-        login_page = LoginPage.objects.live().first()
-        register_page = RegisterPage.objects.live().first()
-        checkout_page = OrderCheckoutPage.objects.live().first()
+        cart = get_request_cart(request)
 
         return render(
             request,
             "includes/cart/table.html",
-            {
-                "cart": cart,
-                "shop_page": shop_page,
-                "login_page": login_page,
-                "register_page": register_page,
-                "checkout_page": checkout_page
-            }
+            {"cart": cart, **get_cart_table_pages()}
         )
@@ -0,0 +1,57 @@
+from django.core.cache import cache
+from django.utils import translation
+
+from wagtail.models import Site
+
+CHROME_VERSION_KEY = 'core:chrome:version'
+PAGE_CACHE_VERSION_KEY = 'core:page_cache:version'
+
+
+def bump_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 2, timeout=None)
+
+
+def get_chrome_version():
+    return cache.get_or_set(CHROME_VERSION_KEY, 1, timeout=None)
+
+
+def bump_chrome_version():
+    """
+    Invalidates every cached header/footer fragment at once (see
+    get_chrome_cache_key); old entries are never read again and expire.
+    """
+    bump_version(CHROME_VERSION_KEY)
+
+
+def get_chrome_cache_key(request):
+    # Menus are translated and settings are per site.
+    site = Site.find_for_request(request)
+    return f'{get_chrome_version()}:{site.pk if site else 0}:{translation.get_language()}'
+
+
+def get_page_version_key(page_id):
+    return f'core:page_cache:page:{page_id}'
+
+
+def get_page_cache_versions(page_id):
+    # Global version (changes shown on every page) and the page's own one.
+    return (
+        cache.get_or_set(PAGE_CACHE_VERSION_KEY, 1, timeout=None),
+        cache.get_or_set(get_page_version_key(page_id), 1, timeout=None),
+    )
+
+
+def purge_page_cache(page_ids=None):
+    """
+    Drops the cached responses of the given pages, or of every page when
+    no ids are given (see CachedPageMixin).
+    """
+    if page_ids is None:
+        bump_version(PAGE_CACHE_VERSION_KEY)
+        return
+
+    for page_id in set(page_ids):
+        bump_version(get_page_version_key(page_id))
@@ -0,0 +1,13 @@
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+
+from core.cache import get_chrome_cache_key
+
+
+def chrome_cache(request):
+    # Used as {% cache chrome_cache_timeout <name> chrome_cache_key %} around
+    # the header and footer includes; resolved only when a template reads it.
+    return {
+        'chrome_cache_timeout': settings.CHROME_CACHE_TIMEOUT,
+        'chrome_cache_key': SimpleLazyObject(lambda: get_chrome_cache_key(request)),
+    }
@@ -0,0 +1,74 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.renditions import collect_filter_specs, collect_live_images, generate_renditions, get_missing_renditions
+
+
+class Command(BaseCommand):
+    help = 'Создаёт недостающие версии (renditions) изображений, используемых на опубликованных страницах'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+        parser.add_argument(
+            '--spec',
+            action='append',
+            dest='specs',
+            help='Фильтр версии (например, "width-100|height-100"); по умолчанию берутся из шаблонов',
+        )
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        specs = set(options['specs'] or collect_filter_specs())
+        missing = get_missing_renditions(collect_live_images(), specs)
+        total = sum(map(len, missing.values()))
+
+        self.stdout.write(
+            f'Фильтры: {", ".join(sorted(specs))}. '
+            f'Не хватает версий: {total} для {len(missing)} изображений'
+        )
+
+        if options['dry_run'] or not missing:
+            return
+
+        done = failed = 0
+
+        def report(image_id, result):
+            nonlocal done, failed
+
+            if isinstance(result, Exception):
+                failed += len(missing[image_id])
+                self.stderr.write(f'Изображение {image_id}: {result}')
+            else:
+                done += result
+
+            self.stdout.write(f'{done + failed}/{total}')
+
+        if options['workers'] <= 1:
+            for image_id, image_specs in missing.items():
+                try:
+                    report(image_id, generate_renditions(image_id, image_specs))
+                except Exception as e:
+                    report(image_id, e)
+
+        else:
+            # Forked workers must not share the parent's database connections.
+            connections.close_all()
+
+            with ProcessPoolExecutor(max_workers=options['workers'], initializer=django.setup) as executor:
+                futures = {
+                    executor.submit(generate_renditions, image_id, image_specs): image_id
+                    for image_id, image_specs in missing.items()
+                }
+
+                for future in as_completed(futures):
+                    try:
+                        report(futures[future], future.result())
+                    except Exception as e:
+                        report(futures[future], e)
+
+        self.stdout.write(self.style.SUCCESS(f'Создано версий: {done}, ошибок: {failed}'))
@@ -0,0 +1,253 @@
+import hashlib
+import threading
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils import translation
+from django.utils.functional import cached_property
+from django.utils.cache import patch_vary_headers
+
+from wagtail.models import Page, get_page_models
+
+from core.cache import get_page_cache_versions
+
+PAGES_VERSION_KEY = 'core:pages:version'
+
+
+def get_singleton_page_models():
+    return [model for model in get_page_models() if model.max_count == 1]
+
+
+class SingletonPage:
+    """
+    What templates and views need from a singleton page (id, URL and title
+    in the active language) without loading it. Any other attribute loads
+    the specific page by id on first use. Works with {% routablepageurl %}
+    as well; {% pageurl %} needs a real Page, so templates use
+    {{ page.url }} instead.
+    """
+
+    def __init__(self, page_class, id, urls, titles):
+        self.page_class = page_class
+        self.id = self.pk = id
+        self.urls = urls
+        self.titles = titles
+
+    def get_value(self, values):
+        language = (translation.get_language() or settings.LANGUAGE_CODE).split('-')[0]
+        return values.get(language, values.get(settings.LANGUAGE_CODE))
+
+    @property
+    def url(self):
+        return self.get_value(self.urls)
+
+    @property
+    def title(self):
+        return self.get_value(self.titles)
+
+    def get_url(self, request=None):
+        return self.url
+
+    def relative_url(self, current_site=None, request=None):
+        return self.url
+
+    def reverse_subpage(self, name, args=None, kwargs=None):
+        return self.page_class.get_resolver().reverse(name, *(args or ()), **(kwargs or {}))
+
+    @cached_property
+    def page(self):
+        return self.page_class.objects.get(pk=self.id)
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        return getattr(self.page, name)
+
+    def __str__(self):
+        return self.title or ''
+
+
+class PageRegistry:
+    """
+    Process-wide map of every max_count = 1 page type to its live page
+    (private pages, behind a view restriction, are left out as by .public()),
+    loaded with one query and shared through the cache, so each process
+    builds it at most once per version. core.signals bumps the version when
+    a page is published, unpublished, moved or deleted. The shared version
+    is read at most once per SINGLETON_PAGES_VERSION_TTL seconds, so
+    another process's change shows up here with that delay.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = None
+        self.checked_at = None
+        self.pages = {}
+
+    def load(self):
+        page_classes = {model._meta.label_lower: model for model in get_singleton_page_models()}
+        pages = {}
+
+        for page in Page.objects.live().public().type(*page_classes.values()).order_by('path'):
+            label = page.specific_class._meta.label_lower
+
+            if label not in page_classes or label in pages:
+                continue
+
+            urls, titles = {}, {}
+
+            # URLs carry the language prefix and translated slugs.
+            for language, _ in settings.LANGUAGES:
+                with translation.override(language):
+                    urls[language] = page.get_url()
+                    titles[language] = page.title
+
+            pages[label] = {'id': page.pk, 'urls': urls, 'titles': titles}
+
+        return pages
+
+    def get_pages(self):
+        checked_at = self.checked_at
+
+        if checked_at is not None and time.monotonic() - checked_at < settings.SINGLETON_PAGES_VERSION_TTL:
+            return self.pages
+
+        version = cache.get_or_set(PAGES_VERSION_KEY, 1, timeout=None)
+
+        if self.version != version:
+            cache_key = f'core:pages:{version}'
+            pages = cache.get(cache_key)
+
+            if pages is None:
+                pages = self.load()
+                cache.set(cache_key, pages, settings.SINGLETON_PAGES_CACHE_TIMEOUT)
+
+            with self.lock:
+                self.pages = pages
+                self.version = version
+
+        self.checked_at = time.monotonic()
+        return self.pages
+
+    def get(self, page_class):
+        data = self.get_pages().get(page_class._meta.label_lower)
+
+        if data is None:
+            return None
+
+        return SingletonPage(page_class, data['id'], data['urls'], data['titles'])
+
+    def invalidate(self):
+        # This process sees the change right away.
+        self.checked_at = None
+
+        try:
+            cache.incr(PAGES_VERSION_KEY)
+        except ValueError:
+            cache.set(PAGES_VERSION_KEY, 2, timeout=None)
+
+
+page_registry = PageRegistry()
+
+
+def get_singleton_page(page_class):
+    """
+    The live page of a max_count = 1 page type as a SingletonPage, or None.
+    """
+    return page_registry.get(page_class)
+
+
+class CachedPageMixin:
+    """
+    Serves anonymous GETs of the page from a shared cache of the whole
+    response, per language, path and page_cache_params. Visitors with a session may have
+    a cart, so their copy loads the header counter and the cart popup with
+    HTMX instead of rendering them. core.signals purges a page with its
+    ancestors on publish, and every page when menus, settings or the page
+    tree change.
+    """
+
+    # Page types (app_label.ModelName) whose publishing also changes this
+    # page, e.g. lists of the latest news.
+    page_cache_dependencies = ()
+
+    # Query parameters that change the page, each a single number (e.g. the
+    # page of a paginated list). Requests with any other parameter or value,
+    # such as utm tags or cache busters, bypass the cache.
+    page_cache_params = ()
+
+    def get_page_cache_versions(self):
+        return get_page_cache_versions(self.pk)
+
+    def get_page_cache_key(self, request, cart_fragments):
+        versions = ':'.join(map(str, self.get_page_cache_versions()))
+        query = urlencode(sorted(request.GET.items()))
+        digest = hashlib.md5(f'{request.path}?{query}'.encode()).hexdigest()
+
+        return f'core:page_cache:{self.pk}:{versions}:{translation.get_language()}:{int(cart_fragments)}:{digest}'
+
+    def is_page_cacheable(self, request):
+        # len() reads pending messages without marking them as shown.
+        return (
+            request.method in ('GET', 'HEAD')
+            and not request.headers.get('HX-Request')
+            and all(
+                name in self.page_cache_params and len(values) == 1 and values[0].isdigit()
+                for name, values in request.GET.lists()
+            )
+            and not request.user.is_authenticated
+            and not len(messages.get_messages(request))
+        )
+
+    def serve(self, request, *args, **kwargs):
+        if not self.is_page_cacheable(request):
+            return super().serve(request, *args, **kwargs)
+
+        cart_fragments = settings.SESSION_COOKIE_NAME in request.COOKIES
+        cache_key = self.get_page_cache_key(request, cart_fragments)
+        cached = cache.get(cache_key)
+
+        if cached is not None:
+            content, headers = cached
+            return HttpResponse(content, headers=headers)
+
+        response = super().serve(request, *args, **kwargs)
+
+        if getattr(response, 'context_data', None) is None:
+            return response
+
+        response.context_data['cart_fragments'] = cart_fragments
+        response.render()
+        # The copy depends on whether the visitor has a session cookie.
+        patch_vary_headers(response, ('Cookie',))
+
+        # A CSRF token or a cookie set for the page belongs to this visitor only.
+        if response.status_code == 200 and not response.cookies and not request.META.get('CSRF_COOKIE_NEEDS_UPDATE'):
+            cache.set(cache_key, (response.content, dict(response.items())), settings.PAGE_CACHE_TIMEOUT)
+
+        return response
+
+
+def get_cached_page_ids(page):
+    """
+    Ids of the pages whose cached responses show the given page: the page,
+    its ancestors and pages of the types that list it in
+    page_cache_dependencies.
+    """
+    page_ids = list(page.get_ancestors(inclusive=True).values_list('pk', flat=True))
+    label = page.specific_class._meta.label
+
+    dependent_models = [
+        model for model in get_page_models()
+        if label in getattr(model, 'page_cache_dependencies', ())
+    ]
+
+    if dependent_models:
+        page_ids += Page.objects.type(*dependent_models).values_list('pk', flat=True)
+
+    return page_ids
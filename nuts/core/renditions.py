@@ -0,0 +1,118 @@
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.db import models
+
+from wagtail.blocks import ListBlock, StreamBlock, StructBlock
+from wagtail.contrib.settings.models import BaseSiteSetting
+from wagtail.fields import StreamField
+from wagtail.images.models import AbstractImage, Image
+from wagtail.models import Page
+
+# {% image <expression> <filter> [<filter> ...] [attr="value" ...] [as name] %}
+IMAGE_TAG_RE = re.compile(r'{%\s*image\s+\S+\s+(.+?)\s*%}')
+
+
+def collect_filter_specs():
+    """
+    Filter specs used by {% image %} tags in the project templates, in the
+    form Wagtail stores them in Rendition.filter_spec ("width-100|height-100").
+    """
+    specs = set()
+
+    for directory in settings.TEMPLATES[0]['DIRS']:
+        for path in Path(directory).rglob('*.html'):
+            for match in IMAGE_TAG_RE.finditer(path.read_text(encoding='utf-8')):
+                bits = match.group(1).split()
+
+                if len(bits) > 1 and bits[-2] == 'as':
+                    bits = bits[:-2]
+
+                filters = [bit for bit in bits if '=' not in bit]
+
+                if filters:
+                    specs.add('|'.join(filters))
+
+    return specs
+
+
+def iter_block_images(block, value):
+    if value is None:
+        return
+
+    if isinstance(value, AbstractImage):
+        yield value.pk
+
+    elif isinstance(block, StreamBlock):
+        for child in value:
+            yield from iter_block_images(child.block, child.value)
+
+    elif isinstance(block, ListBlock):
+        for item in value:
+            yield from iter_block_images(block.child_block, item)
+
+    elif isinstance(block, StructBlock):
+        for name, child_block in block.child_blocks.items():
+            yield from iter_block_images(child_block, value.get(name))
+
+
+def collect_instance_images(instance):
+    """
+    Ids of the images referenced by the instance's image foreign keys and
+    StreamFields (every translation of them included).
+    """
+    image_ids = set()
+
+    for field in instance._meta.concrete_fields:
+        if isinstance(field, models.ForeignKey) and issubclass(field.related_model, AbstractImage):
+            image_id = getattr(instance, field.attname)
+
+            if image_id:
+                image_ids.add(image_id)
+
+        elif isinstance(field, StreamField):
+            image_ids.update(iter_block_images(field.stream_block, getattr(instance, field.name)))
+
+    return image_ids
+
+
+def collect_live_images():
+    image_ids = set()
+
+    for page in Page.objects.live().specific().iterator():
+        image_ids |= collect_instance_images(page)
+
+    # Site settings (e.g. the company logo) are rendered on every page.
+    for model in BaseSiteSetting.__subclasses__():
+        for setting in model.objects.all():
+            image_ids |= collect_instance_images(setting)
+
+    return image_ids
+
+
+def get_missing_renditions(image_ids, specs):
+    """
+    {image id: [filter specs]} of the renditions that do not exist yet.
+    """
+    existing = set(
+        Image.get_rendition_model().objects.filter(
+            image_id__in=image_ids,
+            filter_spec__in=specs,
+        ).values_list('image_id', 'filter_spec')
+    )
+
+    missing = {}
+
+    for image_id in sorted(Image.objects.filter(id__in=image_ids).values_list('id', flat=True)):
+        image_specs = [spec for spec in sorted(specs) if (image_id, spec) not in existing]
+
+        if image_specs:
+            missing[image_id] = image_specs
+
+    return missing
+
+
+def generate_renditions(image_id, specs):
+    Image.objects.get(pk=image_id).get_renditions(*specs)
+    return len(specs)
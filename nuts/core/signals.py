@@ -0,0 +1,157 @@
+import logging
+
+from kombu.exceptions import OperationalError
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from wagtail.models import Page, PageViewRestriction, get_page_models
+from wagtail.signals import page_published, page_unpublished, post_page_move
+
+from core.cache import bump_chrome_version, purge_page_cache
+from core.models import CompanySettings, ContactSettings, DiscountBannerSettings, StatisticsSettings
+from core.pages import get_cached_page_ids, page_registry
+from core.tasks import warm_page_renditions
+
+logger = logging.getLogger(__name__)
+
+
+def queue_page_renditions(page_id):
+    # Warming only saves the first visitors some waiting, so a publish must
+    # not fail when the broker is unreachable.
+    try:
+        warm_page_renditions.delay(page_id)
+    except OperationalError:
+        logger.exception("Could not queue rendition warming for page %s", page_id)
+
+
+@receiver(page_published)
+def warm_renditions_on_publish(sender, instance, **kwargs):
+    transaction.on_commit(lambda: queue_page_renditions(instance.pk))
+
+
+# Columns behind a page's menu title and URL, with their translations.
+PAGE_LINK_FIELDS = [
+    'live',
+    *(field.attname for field in Page._meta.concrete_fields if field.name.startswith(('title', 'slug'))),
+]
+
+
+def get_page_links(page):
+    return {field: getattr(page, field) for field in PAGE_LINK_FIELDS}
+
+
+def remember_page_links(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Keeps the saved live state, title and slug of a page on the instance for
+    page_links_changed. Saves limited to other columns, like the draft
+    saves of save_revision(), are told apart without a query.
+    """
+    instance._saved_page_links = None
+
+    if raw or instance.pk is None:
+        return
+
+    if update_fields is not None and not set(update_fields) & set(PAGE_LINK_FIELDS):
+        instance._saved_page_links = get_page_links(instance)
+    else:
+        instance._saved_page_links = Page.objects.filter(pk=instance.pk).values(*PAGE_LINK_FIELDS).first()
+
+
+def page_links_changed(instance, created):
+    if created:
+        return instance.live
+
+    saved = getattr(instance, '_saved_page_links', None)
+    return saved is not None and saved != get_page_links(instance)
+
+
+@receiver(page_published)
+@receiver(page_unpublished)
+@receiver(post_page_move)
+def invalidate_page_registry(sender, **kwargs):
+    # Any page counts: a new slug or a move of a parent changes the URLs below it.
+    # Once more after the commit, in case another process reloaded the old
+    # rows in between.
+    page_registry.invalidate()
+    transaction.on_commit(page_registry.invalidate)
+    # Menus in the header and footer show page titles and URLs.
+    bump_chrome_version()
+    transaction.on_commit(bump_chrome_version)
+
+
+def invalidate_page_registry_on_save(sender, instance, created, raw=False, **kwargs):
+    # Covers pages created or renamed in code, which are never "published".
+    # Draft saves leave the live title and slug alone.
+    if not raw and page_links_changed(instance, created):
+        invalidate_page_registry(sender)
+
+
+def purge_pages(page_ids=None):
+    # Once more after the commit, in case another process cached the old
+    # version of a page in between.
+    purge_page_cache(page_ids)
+    transaction.on_commit(lambda: purge_page_cache(page_ids))
+
+
+@receiver(page_published)
+def purge_page_cache_on_publish(sender, instance, **kwargs):
+    purge_pages(get_cached_page_ids(instance))
+
+
+def purge_page_cache_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+
+    if created:
+        purge_pages(get_cached_page_ids(instance))
+    elif instance.specific_class.max_count == 1 and page_links_changed(instance, created):
+        # Singleton pages are linked from the menus of every page.
+        purge_pages()
+
+
+@receiver(page_unpublished)
+@receiver(post_page_move)
+def purge_page_cache_on_tree_change(sender, **kwargs):
+    # Links to the page and breadcrumbs below it can be on any page.
+    purge_pages()
+
+
+def purge_page_cache_on_delete(sender, **kwargs):
+    purge_pages()
+
+
+# Connected per page model: a post_delete receiver without a sender would
+# turn off fast deletes for every model.
+for page_model in [Page, *get_page_models()]:
+    label = page_model._meta.label
+    pre_save.connect(remember_page_links, sender=page_model, dispatch_uid=f'page_links_{label}')
+    post_save.connect(invalidate_page_registry_on_save, sender=page_model, dispatch_uid=f'page_registry_save_{label}')
+    post_delete.connect(invalidate_page_registry, sender=page_model, dispatch_uid=f'page_registry_delete_{label}')
+    post_save.connect(purge_page_cache_on_save, sender=page_model, dispatch_uid=f'page_cache_save_{label}')
+    post_delete.connect(purge_page_cache_on_delete, sender=page_model, dispatch_uid=f'page_cache_delete_{label}')
+
+
+@receiver(post_save, sender=CompanySettings)
+@receiver(post_save, sender=ContactSettings)
+@receiver(post_save, sender=DiscountBannerSettings)
+@receiver(post_save, sender=StatisticsSettings)
+@receiver(post_delete, sender=CompanySettings)
+@receiver(post_delete, sender=ContactSettings)
+@receiver(post_delete, sender=DiscountBannerSettings)
+@receiver(post_delete, sender=StatisticsSettings)
+def invalidate_chrome_on_settings_change(sender, **kwargs):
+    bump_chrome_version()
+    transaction.on_commit(bump_chrome_version)
+    # Cached pages include the header and footer.
+    purge_pages()
+
+
+@receiver(post_save, sender=PageViewRestriction)
+@receiver(post_delete, sender=PageViewRestriction)
+def invalidate_page_registry_on_restriction_change(sender, **kwargs):
+    # The registry leaves private pages out, so a restriction added or
+    # removed changes which pages it links to.
+    invalidate_page_registry(sender)
+    purge_pages()
@@ -0,0 +1,21 @@
+from celery import shared_task
+
+from wagtail.models import Page
+
+from core.renditions import collect_filter_specs, collect_instance_images, generate_renditions, get_missing_renditions
+
+
+@shared_task
+def warm_page_renditions(page_id):
+    """
+    Generates the missing renditions of a freshly published page so its
+    first visitors do not wait for image processing.
+    """
+    page = Page.objects.filter(pk=page_id).specific().first()
+
+    if page is None:
+        return 0
+
+    missing = get_missing_renditions(collect_instance_images(page), collect_filter_specs())
+
+    return sum(generate_renditions(image_id, specs) for image_id, specs in missing.items())
@@ -2,6 +2,7 @@ import re
 from django import template
 from django.utils.safestring import mark_safe
 
+from core.pages import get_singleton_page
 from shop.models import ShopPage
 from about.models import AboutPage
 from payment_and_delivery.models import PaymentAndDeliveryPage
@@ -46,11 +47,11 @@ def format_phone_html(value):
 @register.inclusion_tag('tags/menu_links.html', takes_context=True)
 def menu_links(context):
     return {
-        'shop_page': ShopPage.objects.live().first(),
-        'about_page': AboutPage.objects.live().first(),
-        'delivery_page': PaymentAndDeliveryPage.objects.live().first(),
-        'customers_page': CustomersPage.objects.live().first(),
-        'news_page': NewsIndexPage.objects.live().first(),
+        'shop_page': get_singleton_page(ShopPage),
+        'about_page': get_singleton_page(AboutPage),
+        'delivery_page': get_singleton_page(PaymentAndDeliveryPage),
+        'customers_page': get_singleton_page(CustomersPage),
+        'news_page': get_singleton_page(NewsIndexPage),
         'request': context.get('request')
     }
 
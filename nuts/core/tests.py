@@ -1,3 +1,204 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from kombu.exceptions import OperationalError
+from PIL import Image as PILImage
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.images import ImageFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import translation
+
+from wagtail.images.models import Image
+from wagtail.models import Page, PageViewRestriction, Site
+
+from auth.models import LoginPage
+from core.cache import get_page_cache_versions
+from core.models import CompanySettings, ContactSettings, DiscountBannerSettings, StatisticsSettings
+from core.pages import PAGES_VERSION_KEY, get_singleton_page, page_registry
+from core.renditions import collect_filter_specs, collect_live_images
+from customers.models import CustomersPage
+from home.models import HomePage
+from payment_and_delivery.models import PaymentAndDeliveryPage
+from shop.models import ShopPage
+
+
+class WarmRenditionsTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def make_image(self, title):
+        buffer = BytesIO()
+        PILImage.new('RGB', (200, 200), 'brown').save(buffer, 'PNG')
+        return Image.objects.create(title=title, file=ImageFile(buffer, name=f'{title}.png'))
+
+    def test_generates_missing_renditions_for_live_pages_and_settings(self):
+        walnut, hero, logo, unused = (self.make_image(title) for title in ('walnut', 'hero', 'logo', 'unused'))
+
+        root = Page.get_first_root_node()
+        site = Site.objects.create(hostname='testserver', root_page=root, is_default_site=True)
+        root.add_child(instance=HomePage(
+            title='Home',
+            slug='home',
+            walnut_image=walnut,
+            image_hero=[('image_jumbotron', {'background_image': hero, 'title': 'Орехи'})],
+        ))
+        CompanySettings.objects.create(site=site, logo=logo)
+
+        self.assertEqual(collect_live_images(), {walnut.pk, hero.pk, logo.pk})
+        self.assertIn('width-100|height-100', collect_filter_specs())
+
+        call_command('warm_renditions', workers=1, spec=['original', 'width-100'], stdout=StringIO())
+
+        self.assertEqual(
+            set(Image.get_rendition_model().objects.values_list('image_id', 'filter_spec')),
+            {(image.pk, spec) for image in (walnut, hero, logo) for spec in ('original', 'width-100')},
+        )
+
+
+class WarmRenditionsOnPublishTests(TestCase):
+    def test_publish_does_not_depend_on_the_broker(self):
+        home = Page.get_first_root_node().add_child(instance=HomePage(title='Home', slug='home', live=False))
+
+        with mock.patch('core.tasks.warm_page_renditions.delay', side_effect=OperationalError('no broker')) as delay, \
+                self.assertLogs('core.signals', 'ERROR'), self.captureOnCommitCallbacks(execute=True):
+            home.save_revision().publish()
+
+        delay.assert_called_once_with(home.pk)
+        home.refresh_from_db()
+        self.assertTrue(home.live)
+
+
+class PageRegistryTests(TestCase):
+    def setUp(self):
+        # Pages of earlier tests were rolled back without signals.
+        page_registry.invalidate()
+
+    def test_resolves_singleton_pages_in_one_query(self):
+        home = Page.get_first_root_node().add_child(instance=HomePage(title='Home', slug='home'))
+        Site.objects.all().delete()
+        Site.objects.create(hostname='testserver', root_page=home, is_default_site=True)
+        shop = home.add_child(instance=ShopPage(title='Shop', title_ru='Магазин', slug='shop'))
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(get_singleton_page(ShopPage).id, shop.pk)
+            self.assertIsNone(get_singleton_page(LoginPage))
+
+        # Plus content type and site root path lookups, which are cached separately.
+        self.assertEqual(sum('FROM "wagtailcore_page"' in query['sql'] for query in queries.captured_queries), 1)
+
+        with self.assertNumQueries(0):
+            shop_page = get_singleton_page(ShopPage)
+
+            with translation.override('ru'):
+                self.assertEqual((shop_page.url, shop_page.title), ('/ru/shop/', 'Магазин'))
+
+        # The shared version is not read again on every lookup.
+        with mock.patch.object(cache, 'get_or_set', wraps=cache.get_or_set) as get_or_set:
+            get_singleton_page(ShopPage)
+            get_singleton_page(LoginPage)
+
+        self.assertFalse(get_or_set.called)
+
+        # Draft saves don't change the live pages.
+        version = cache.get(PAGES_VERSION_KEY)
+        shop.title = 'Shop draft'
+        shop.save_revision()
+        self.assertEqual(cache.get(PAGES_VERSION_KEY), version)
+
+        login = home.add_child(instance=LoginPage(title='Login', slug='login', live=False))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            login.save_revision().publish()
+
+        self.assertEqual(get_singleton_page(LoginPage).id, login.pk)
+
+        # Other fields come from the page itself.
+        self.assertEqual(get_singleton_page(LoginPage).slug, 'login')
+
+        # Private pages are left out, as by .public().
+        PageViewRestriction.objects.create(page=login, restriction_type=PageViewRestriction.LOGIN)
+        self.assertIsNone(get_singleton_page(LoginPage))
+
+
+class ChromeCacheTests(TestCase):
+    def test_header_and_footer_are_cached_until_settings_change(self):
+        home = Page.get_first_root_node().add_child(instance=HomePage(title='Home', slug='home'))
+        Site.objects.all().delete()
+        site = Site.objects.create(hostname='testserver', root_page=home, is_default_site=True)
+        login = home.add_child(instance=LoginPage(title='Login', slug='login'))
+        contact_settings = ContactSettings.objects.create(site=site, email='sales@example.com')
+        # Otherwise created (and saved) by the first render.
+        CompanySettings.objects.create(site=site)
+        DiscountBannerSettings.objects.create(site=site)
+
+        self.client.get(login.url)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(login.url)
+
+        self.assertContains(response, 'sales@example.com')
+        self.assertFalse([query['sql'] for query in queries.captured_queries if 'settings' in query['sql']])
+
+        contact_settings.email = 'info@example.com'
+        contact_settings.save()
+
+        self.assertContains(self.client.get(login.url), 'info@example.com')
+
+
+class PageCacheTests(TestCase):
+    def setUp(self):
+        self.home = Page.get_first_root_node().add_child(instance=HomePage(title='Home', slug='home'))
+        Site.objects.all().delete()
+        site = Site.objects.create(hostname='testserver', root_page=self.home, is_default_site=True)
+        self.customers = self.home.add_child(instance=CustomersPage(title='Customers', slug='customers', description_column_1='<p>Supermarkets</p>'))
+        self.delivery = self.home.add_child(instance=PaymentAndDeliveryPage(title='Delivery', slug='delivery'))
+        CompanySettings.objects.create(site=site)
+        ContactSettings.objects.create(site=site)
+        DiscountBannerSettings.objects.create(site=site)
+        StatisticsSettings.objects.create(site=site)
+
+    def test_anonymous_responses_are_cached_until_the_page_is_published(self):
+        miss = self.client.get(self.customers.url)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.customers.url)
+
+        self.assertContains(response, 'Supermarkets')
+        self.assertEqual(response.content, miss.content)
+        self.assertEqual(dict(response.headers), dict(miss.headers))
+        self.assertIn('Cookie', response['Vary'])
+        # Only the routing to the page, no template or context queries.
+        self.assertFalse([query['sql'] for query in queries.captured_queries if 'cart' in query['sql'] or 'settings' in query['sql']])
+
+        delivery_versions = get_page_cache_versions(self.delivery.pk)
+        self.customers.description_column_1 = '<p>HoReCa</p>'
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.customers.save_revision().publish()
+
+        self.assertContains(self.client.get(self.customers.url), 'HoReCa')
+        self.assertEqual(get_page_cache_versions(self.delivery.pk), delivery_versions)
+
+        # Parameters outside page_cache_params bypass the cache.
+        with mock.patch.object(cache, 'set', wraps=cache.set) as cache_set:
+            self.client.get(self.customers.url + '?utm_source=mail')
+            self.client.get(self.customers.url + '?page=2')
+
+        self.assertFalse([call for call in cache_set.call_args_list if call.args[0].startswith('core:page_cache:')])
+
+        # A visitor with a session may have a cart: the counter is loaded separately.
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = 'session'
+        self.assertContains(self.client.get(self.customers.url), f'hx-get="{reverse("cart:counter")}"')
@@ -5,10 +5,11 @@ from wagtail.fields import StreamField, RichTextField
 from wagtail.admin.panels import FieldPanel
 
 from core.blocks import ImageJumbotronBlock
+from core.pages import CachedPageMixin
 
 from .blocks import CustomerInfoBlock
 
-class CustomersPage(Page):
+class CustomersPage(CachedPageMixin, Page):
     template = "customers.html"
 
     parent_page_types = ['home.HomePage']
@@ -9,16 +9,20 @@ from wagtail.admin.panels import FieldPanel
 from wagtailmedia.blocks import VideoChooserBlock
 
 from core.blocks import VideoJumbotronBlock
+from core.pages import CachedPageMixin
 
 from .blocks import GalleryImageWithTextBlock
 
 
-class GalleryPage(Page):
+class GalleryPage(CachedPageMixin, Page):
     template = "gallery.html"
     parent_page_types = ['home.HomePage']
     subpage_types = []
     max_count = 1
 
+    # Blocks are paginated with ?page=.
+    page_cache_params = ('page',)
+
     hero = StreamField(
         [
             ('video_jumbotron', VideoJumbotronBlock()),
@@ -6,18 +6,21 @@ from wagtail.admin.panels import FieldPanel
 from wagtail.fields import StreamField
 
 from core.blocks import VideoJumbotronBlock, ImageJumbotronBlock
+from core.pages import CachedPageMixin, get_singleton_page
 
 from about.models import AboutPage
 
 from products.models import Product, ProductPage
 
+from shop.cache import get_catalog_version
 from shop.models import ShopPage
 
 from news.models import NewsIndexPage, NewsDetailPage
 
 
-class HomePage(Page):
+class HomePage(CachedPageMixin, Page):
     parent_page_types = []
+    max_count = 1
     template = 'home.html'
 
     video_hero = StreamField(
@@ -98,15 +101,19 @@ class HomePage(Page):
         use_json_field=True
     )
 
+    def get_page_cache_versions(self):
+        # The products block changes with the catalog.
+        return (*super().get_page_cache_versions(), get_catalog_version())
+
     def get_context(self, request, *args, **kwargs):
         context = super().get_context(request)
 
-        context["about_page"] = AboutPage.objects.live().public().first()
-        context["news_page"] = NewsIndexPage.objects.live().first()
-        context["product_page"] = ProductPage.objects.live().first()
+        context["about_page"] = get_singleton_page(AboutPage)
+        context["news_page"] = get_singleton_page(NewsIndexPage)
+        context["product_page"] = get_singleton_page(ProductPage)
         context["news_list"] = NewsDetailPage.objects.live().order_by('-publication_date')[:3]
         context["products"] = Product.objects.all().prefetch_related('images', 'features')[:1]
-        context["shop_page"] = ShopPage.objects.live().first()
+        context["shop_page"] = get_singleton_page(ShopPage)
 
         return context
 
@@ -12,6 +12,7 @@ from wagtail.admin.panels import FieldPanel
 from wagtailmedia.blocks import VideoChooserBlock
 
 from core.blocks import VideoJumbotronBlock
+from core.pages import CachedPageMixin
 
 
 class NewsIndexPage(Page):
@@ -65,11 +66,14 @@ class NewsIndexPage(Page):
         verbose_name = "News index page"
 
 
-class NewsDetailPage(Page):
+class NewsDetailPage(CachedPageMixin, Page):
     template = "news/news_detail.html"
 
     parent_page_types = ['news.NewsIndexPage']
 
+    # Shows the latest news besides this one.
+    page_cache_dependencies = ('news.NewsDetailPage',)
+
     publication_date = models.DateField()
 
     main_media = StreamField(
@@ -4,6 +4,8 @@ from wagtail.admin.panels import FieldPanel
 from wagtail.images.models import Image
 from wagtail.models import Page
 
+from core.pages import get_singleton_page
+
 from home.models import HomePage
 
 
@@ -28,7 +30,7 @@ class NotFoundPage(Page):
     def get_context(self, request, *args, **kwargs):
         context = super().get_context(request)
 
-        context["home_page"] = HomePage.objects.live().public().first()
+        context["home_page"] = get_singleton_page(HomePage)
 
         return context
 
@@ -43,6 +43,7 @@ INSTALLED_APPS = [
     "wagtail.contrib.forms",
     "wagtail.contrib.settings",
     "wagtail.contrib.redirects",
+    "wagtail.contrib.routable_page",
     "wagtail.embeds",
     "wagtail.sites",
     "wagtail.users",
@@ -105,7 +106,8 @@ TEMPLATES = [
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
                 "wagtail.contrib.settings.context_processors.settings",
-                'cart.context_processors.cart_processor'
+                'cart.context_processors.cart_processor',
+                'core.context_processors.chrome_cache',
             ],
         },
     },
@@ -229,6 +231,14 @@ WAGTAIL_SITE_NAME = "nuts"
 
 # Search
 # https://docs.wagtail.org/en/stable/topics/search/backends.html
+# Product typeahead (search.views.autocomplete): suggestions per query, the
+# minimum pg_trgm word similarity of a match (lower tolerates more typos) and
+# how long a rendered suggestion list stays in the shared default cache (see
+# CACHES), so every process serves the same suggestions.
+SEARCH_AUTOCOMPLETE_LIMIT = env.int("SEARCH_AUTOCOMPLETE_LIMIT", default=8)
+SEARCH_AUTOCOMPLETE_SIMILARITY = env.float("SEARCH_AUTOCOMPLETE_SIMILARITY", default=0.4)
+SEARCH_AUTOCOMPLETE_CACHE_TIMEOUT = env.int("SEARCH_AUTOCOMPLETE_CACHE_TIMEOUT", default=60 * 60)
+
 WAGTAILSEARCH_BACKENDS = {
     "default": {
         "BACKEND": "wagtail.search.backends.database",
@@ -274,9 +284,63 @@ UNFOLD = {
 CELERY_BROKER_URL = env("CELERY_BROKER_URL")
 CELERY_RESULT_BACKEND = env("CELERY_RESULT_BACKEND")
 
+# Shared by every web and worker process, so an invalidation reaches all of
+# them. Defaults to the Redis instance of the broker; set CACHE_URL to give
+# the cache its own database, as cache.clear() flushes the whole database.
+CACHES = {
+    "default": env.cache("CACHE_URL", default=CELERY_BROKER_URL),
+}
+
+# Cart storage backend. "cart.storage.RedisCartStorage" keeps anonymous carts
+# in Redis and writes them to Postgres only on login/registration.
+CART_STORAGE = env("CART_STORAGE", default="cart.storage.DatabaseCartStorage")
+CART_REDIS_URL = env("CART_REDIS_URL", default=CELERY_BROKER_URL)
+
+# Anonymous and inactive carts untouched for this long are deleted by
+# cart.tasks.prune_stale_carts, CART_PRUNE_BATCH_SIZE rows per transaction.
+CART_PRUNE_AFTER_DAYS = env.int("CART_PRUNE_AFTER_DAYS", default=30)
+CART_PRUNE_BATCH_SIZE = env.int("CART_PRUNE_BATCH_SIZE", default=1000)
+CART_PRUNE_MAX_BATCHES = env.int("CART_PRUNE_MAX_BATCHES", default=100)
+
+# Products per "load more" page of the shop catalog.
+SHOP_CATALOG_PAGE_SIZE = env.int("SHOP_CATALOG_PAGE_SIZE", default=1)
+# Filter, sort and paginate the catalog in a process-local NumPy index
+# (shop.index) and only load the page's products. Requires numpy.
+SHOP_CATALOG_INDEX = env.bool("SHOP_CATALOG_INDEX", default=False)
+# Rendered catalog fragments are also invalidated by product signals (shop.signals).
+SHOP_CATALOG_CACHE_TIMEOUT = env.int("SHOP_CATALOG_CACHE_TIMEOUT", default=60 * 60 * 24)
+# Rendered product detail fragments, keyed by Product.updated_at (product.html).
+SHOP_PRODUCT_CACHE_TIMEOUT = env.int("SHOP_PRODUCT_CACHE_TIMEOUT", default=60 * 60 * 24)
+# How long browsers and shared caches (CDNs) may reuse the product page served
+# to anonymous visitors (ProductPage.product_detail).
+PRODUCT_PAGE_CACHE_MAX_AGE = env.int("PRODUCT_PAGE_CACHE_MAX_AGE", default=60 * 5)
+
+# WebP renditions of product images (products.tasks), used in img srcset.
+PRODUCT_IMAGE_RENDITION_WIDTHS = env.list("PRODUCT_IMAGE_RENDITION_WIDTHS", cast=int, default=[320, 640, 960])
+PRODUCT_IMAGE_WEBP_QUALITY = env.int("PRODUCT_IMAGE_WEBP_QUALITY", default=80)
+# Rows per transaction of the supplier file import (products.importer).
+PRODUCT_IMPORT_BATCH_SIZE = env.int("PRODUCT_IMPORT_BATCH_SIZE", default=1000)
+# Rows fetched per server-side cursor round trip by the admin exports (core.exports).
+ADMIN_EXPORT_CHUNK_SIZE = env.int("ADMIN_EXPORT_CHUNK_SIZE", default=2000)
+# Id, URL and title of every max_count = 1 page (core.pages), also
+# invalidated by page publish/unpublish/move/delete signals (core.signals).
+SINGLETON_PAGES_CACHE_TIMEOUT = env.int("SINGLETON_PAGES_CACHE_TIMEOUT", default=60 * 60 * 24)
+# How long a process uses its copy before checking the shared version again.
+SINGLETON_PAGES_VERSION_TTL = env.float("SINGLETON_PAGES_VERSION_TTL", default=5)
+# Rendered header, menus and footer (core.context_processors.chrome_cache),
+# also invalidated when settings are saved or pages change (core.signals).
+CHROME_CACHE_TIMEOUT = env.int("CHROME_CACHE_TIMEOUT", default=60 * 60 * 24)
+# Whole responses of content pages for anonymous visitors (core.pages.CachedPageMixin),
+# purged on publish and on menu, settings and page tree changes (core.signals).
+PAGE_CACHE_TIMEOUT = env.int("PAGE_CACHE_TIMEOUT", default=60 * 60)
+
 CELERY_BEAT_SCHEDULE = {
     'simulate-orders-every-10-seconds': {
         'task': 'orders.tasks.simulate_order_processing',
         'schedule': 10.0,
     },
+    'prune-stale-carts-every-hour': {
+        'task': 'cart.tasks.prune_stale_carts',
+        'schedule': 60 * 60.0,
+    },
 }
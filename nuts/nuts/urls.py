@@ -29,5 +29,6 @@ urlpatterns = urlpatterns + i18n_patterns(
     path("cart/", include("cart.urls")),
     path("orders/", include("orders.urls")),
     path("search/", search_views.search, name="search"),
+    path("search/autocomplete/", search_views.autocomplete, name="search-autocomplete"),
     path("", include(wagtail_urls)),
 )
@@ -1,3 +1,82 @@
 from django.contrib import admin
+from django.db.models import Prefetch
+from django.utils import timezone
 
-# Register your models here.
+from unfold.admin import ModelAdmin, TabularInline
+
+from core.exports import ExportActionsMixin
+
+from orders.models import Order, OrderItem, StockReservation
+
+
+class OrderItemInline(TabularInline):
+    model = OrderItem
+    extra = 0
+    fields = ("product", "quantity", "price")
+    autocomplete_fields = ("product",)
+
+
+class StockReservationInline(TabularInline):
+    model = StockReservation
+    extra = 0
+    fields = ("product", "quantity", "created_at", "released_at")
+    readonly_fields = fields
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+def get_items_summary(order):
+    return "; ".join(f"{item.product.sku} x {item.quantity} по {item.price}" for item in order.items.all())
+
+
+def get_items_total(order):
+    return sum(item.price * item.quantity for item in order.items.all())
+
+
+@admin.register(Order)
+class OrderModelAdmin(ExportActionsMixin, ModelAdmin):
+    inlines = [OrderItemInline, StockReservationInline]
+
+    actions = ["export_csv", "export_xlsx"]
+
+    show_facets = admin.ShowFacets.NEVER
+
+    search_fields = ["full_name", "company_name", "email", "phone"]
+
+    list_display = ["id", "full_name", "phone", "status", "payment_method", "delivery_method", "created_at"]
+
+    list_select_related = ["customer"]
+
+    list_filter_submit = True
+
+    list_filter = ["status", "payment_method", "delivery_method"]
+
+    export_columns = [
+        ("ID", lambda order: order.pk),
+        ("Дата создания", lambda order: timezone.localtime(order.created_at)),
+        ("Статус", lambda order: order.get_status_display()),
+        ("Покупатель", lambda order: order.customer.full_name if order.customer else ""),
+        ("Название компании", lambda order: order.company_name),
+        ("Контактное лицо", lambda order: order.contact_person),
+        ("ФИО", lambda order: order.full_name),
+        ("E-Mail", lambda order: order.email),
+        ("Номер телефона", lambda order: order.phone),
+        ("Способ оплаты", lambda order: order.get_payment_method_display()),
+        ("Способ доставки", lambda order: order.get_delivery_method_display()),
+        ("Страна доставки", lambda order: order.delivery_country.name if order.delivery_country else ""),
+        ("Регион доставки", lambda order: order.delivery_region.name if order.delivery_region else ""),
+        ("Адрес доставки", lambda order: order.delivery_address),
+        ("Товары", get_items_summary),
+        ("Сумма", get_items_total),
+    ]
+
+    def get_export_queryset(self, queryset):
+        return queryset.order_by("pk").select_related(
+            "customer", "delivery_country", "delivery_region"
+        ).prefetch_related(
+            Prefetch("items", queryset=OrderItem.objects.select_related("product").only(
+                "order_id", "quantity", "price", "product__sku"
+            ).order_by("pk"))
+        )
@@ -0,0 +1,114 @@
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Sum
+
+from orders.managers import InsufficientStock
+from orders.models import Order, StockReservation
+from products.models import Product
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест резервирования остатков: параллельные оформления заказов на несколько '
+        '"горячих" товаров. Создаёт временные товары и заказы и удаляет их после замера'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=16, help='Параллельных оформлений')
+        parser.add_argument('--checkouts', type=int, default=400)
+        parser.add_argument('--products', type=int, default=3, help='Сколько товаров разбирают')
+        parser.add_argument('--stock', type=int, default=300, help='Начальный остаток каждого товара')
+        parser.add_argument(
+            '--work-ms', type=float, default=5,
+            help='Время остальной работы транзакции оформления (запись заказа, позиций, корзины)'
+        )
+
+    def handle(self, *args, **options):
+        run = uuid.uuid4().hex[:8]
+        products = Product.objects.bulk_create(
+            Product(
+                name=f'Benchmark {run} {i}',
+                sku=f'BENCH-{run}-{i}',
+                weight=100,
+                calories=600,
+                shelf_life_months=12,
+                ingredients='-',
+                price=100,
+            )
+            for i in range(options['products'])
+        )
+        product_ids = [product.pk for product in products]
+
+        try:
+            # Lock first: rows are locked by SELECT ... FOR UPDATE at the start of
+            # the transaction, as with check-then-save. Reserve last: the
+            # conditional UPDATEs are the last statements before the commit.
+            for name, lock_first in (('Блокировка в начале', True), ('Резерв в конце', False)):
+                Product.objects.filter(id__in=product_ids).update(stock=options['stock'])
+                self.benchmark(name, lock_first, run, product_ids, options)
+        finally:
+            Order.objects.filter(phone__startswith=f'bench-{run}-').delete()
+            Product.objects.filter(id__in=product_ids).delete()
+
+    def checkout(self, number, lock_first, run, product_ids, work_seconds):
+        # One or two random products, one unit each.
+        quantities = {product_id: 1 for product_id in random.sample(product_ids, random.randint(1, min(2, len(product_ids))))}
+
+        try:
+            with transaction.atomic():
+                if lock_first:
+                    list(Product.objects.filter(id__in=quantities).order_by('id').select_for_update())
+
+                order = Order.objects.create(
+                    phone=f'bench-{run}-{number}',
+                    payment_method=Order.PaymentMethod.CASH_ON_DELIVERY,
+                    delivery_method=Order.DeliveryMethod.PICKUP,
+                )
+                time.sleep(work_seconds)
+                StockReservation.objects.reserve(order, quantities)
+
+        except InsufficientStock:
+            return False
+
+        return True
+
+    def benchmark(self, name, lock_first, run, product_ids, options):
+        Order.objects.filter(phone__startswith=f'bench-{run}-').delete()
+        work_seconds = options['work_ms'] / 1000
+        numbers = iter(range(options['checkouts']))
+
+        def worker():
+            successful = 0
+
+            try:
+                for number in numbers:
+                    successful += self.checkout(number, lock_first, run, product_ids, work_seconds)
+            finally:
+                connection.close()
+
+            return successful
+
+        started = time.perf_counter()
+
+        with ThreadPoolExecutor(options['workers']) as executor:
+            futures = [executor.submit(worker) for _ in range(options['workers'])]
+            successful = sum(future.result() for future in futures)
+
+        elapsed = time.perf_counter() - started
+
+        reserved = StockReservation.objects.filter(product_id__in=product_ids).aggregate(total=Sum('quantity'))['total'] or 0
+        left = Product.objects.filter(id__in=product_ids).aggregate(total=Sum('stock'))['total']
+        consistent = reserved + left == options['stock'] * len(product_ids)
+
+        self.stdout.write(
+            f'{name}: {options["checkouts"] / elapsed:.0f} оформлений/с, успешных {successful}, '
+            f'отказов {options["checkouts"] - successful}, зарезервировано {reserved}, осталось {left}'
+        )
+
+        if not consistent:
+            self.stderr.write(self.style.ERROR(f'{name}: остатки не сходятся с резервами'))
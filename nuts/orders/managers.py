@@ -0,0 +1,68 @@
+from django.apps import apps
+from django.db import models, connections, transaction
+from django.utils import timezone
+
+
+class InsufficientStock(Exception):
+    def __init__(self, product):
+        super().__init__(f"Недостаточно товара на складе: {product}")
+        self.product = product
+
+
+class StockReservationManager(models.Manager):
+    def reserve(self, order, quantities):
+        """
+        Takes {product_id: quantity} from stock for the order and records it
+        in the ledger. Must run inside the checkout transaction, as its last
+        step: every conditional UPDATE keeps the product row locked until
+        commit, so concurrent checkouts of the same product only wait for
+        each other's commit. Rows are updated in product id order, so two
+        checkouts can't deadlock. Products without stock tracking are left
+        alone. Raises InsufficientStock for the first product that ran out.
+        """
+        Product = apps.get_model('products', 'Product')
+
+        tracked = sorted(
+            Product.objects.filter(id__in=quantities, stock__isnull=False).values_list('id', flat=True)
+        )
+
+        for product_id in tracked:
+            if not Product.objects.take_stock(product_id, quantities[product_id]):
+                raise InsufficientStock(Product.objects.get(id=product_id))
+
+        self.bulk_create(
+            self.model(order=order, product_id=product_id, quantity=quantities[product_id])
+            for product_id in tracked
+        )
+
+    def release(self, order_ids):
+        """
+        Returns the stock reserved by the given orders. The reservations are
+        marked released with a conditional UPDATE ... RETURNING first, so an
+        order released twice (or by two workers at once) returns it once.
+        """
+        Product = apps.get_model('products', 'Product')
+        order_ids = list(order_ids)
+
+        if not order_ids:
+            return
+
+        with transaction.atomic(using=self.db):
+            with connections[self.db].cursor() as cursor:
+                cursor.execute(
+                    f"""
+                    UPDATE {self.model._meta.db_table}
+                    SET released_at = %s
+                    WHERE order_id = ANY(%s) AND released_at IS NULL
+                    RETURNING product_id, quantity
+                    """,
+                    [timezone.now(), order_ids]
+                )
+                rows = cursor.fetchall()
+
+            quantities = {}
+
+            for product_id, quantity in rows:
+                quantities[product_id] = quantities.get(product_id, 0) + quantity
+
+            Product.objects.return_stock(quantities)
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.9 on 2026-10-18 19:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0004_alter_order_status'),
+        ('products', '0010_product_stock'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='order',
+            name='status',
+            field=models.CharField(choices=[('NEW', 'Новый'), ('PROCESSING', 'В обработке'), ('FAILED', 'Провален'), ('PAID', 'Оплачен'), ('SHIPPED', 'Отправлен'), ('COMPLETED', 'Завершен'), ('CANCELED', 'Отменен')], default='NEW', max_length=10, verbose_name='Статус'),
+        ),
+        migrations.CreateModel(
+            name='StockReservation',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('quantity', models.PositiveIntegerField(verbose_name='Количество')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата резервирования')),
+                ('released_at', models.DateTimeField(blank=True, null=True, verbose_name='Дата снятия резерва')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_reservations', to='orders.order', verbose_name='Заказ')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='stock_reservations', to='products.product', verbose_name='Товар')),
+            ],
+            options={
+                'verbose_name': 'Резерв товара',
+                'verbose_name_plural': 'Резервы товаров',
+                'constraints': [models.UniqueConstraint(fields=('order', 'product'), name='stock_reservation_order_product_uniq')],
+            },
+        ),
+    ]
@@ -5,7 +5,9 @@ from wagtail.models import Page
 from core.validators import ukrainian_phone_validator
 from auth.mixins import CustomerProfileRequiredMixin
 
-from cart.models import Cart
+from cart.utils import get_request_cart
+
+from orders.managers import StockReservationManager
 
 
 class OrderCheckoutPage(CustomerProfileRequiredMixin, Page):
@@ -22,7 +24,7 @@ class OrderCheckoutPage(CustomerProfileRequiredMixin, Page):
 
         profile = getattr(request.user, 'customer_profile', None)
 
-        cart = Cart.objects.get_cart_with_totals(request)
+        cart = get_request_cart(request)
 
         form = OrderCreateForm(customer_profile=profile)
 
@@ -150,3 +152,35 @@ class OrderItem(models.Model):
     class Meta:
         verbose_name = 'Товар в заказе'
         verbose_name_plural = 'Товары в заказе'
+
+
+class StockReservation(models.Model):
+    """
+    Stock taken from a product by an order; released_at is set when the
+    order fails or is canceled and the stock goes back.
+    """
+    id = models.BigAutoField(primary_key=True)
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.CASCADE,
+        related_name='stock_reservations',
+        verbose_name='Заказ'
+    )
+    product = models.ForeignKey(
+        'products.Product',
+        on_delete=models.PROTECT,
+        related_name='stock_reservations',
+        verbose_name='Товар'
+    )
+    quantity = models.PositiveIntegerField('Количество')
+    created_at = models.DateTimeField('Дата резервирования', auto_now_add=True)
+    released_at = models.DateTimeField('Дата снятия резерва', null=True, blank=True)
+
+    objects = StockReservationManager()
+
+    class Meta:
+        verbose_name = 'Резерв товара'
+        verbose_name_plural = 'Резервы товаров'
+        constraints = [
+            models.UniqueConstraint(fields=['order', 'product'], name='stock_reservation_order_product_uniq'),
+        ]
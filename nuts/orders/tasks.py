@@ -2,13 +2,16 @@ import random
 from celery import shared_task
 from django.db import transaction
 from django.db.models import Sum, F
-from orders.models import Order
+from orders.models import Order, StockReservation
 from payment_transactions.models import PaymentTransaction
 
 
 @shared_task
 def simulate_order_processing():
     with transaction.atomic():
+        # Замовлення, що перейшли у FAILED або CANCELED, повертають резерв на склад
+        released_order_ids = []
+
         # Використовуємо select_for_update(), щоб уникнути конфліктів при паралельних запусках
 
         # 5. SHIPPED -> COMPLETED або CANCELED
@@ -18,6 +21,9 @@ def simulate_order_processing():
             order.status = Order.OrderStatus.COMPLETED if random.random() < 2 / 3 else Order.OrderStatus.CANCELED
             order.save()
 
+            if order.status == Order.OrderStatus.CANCELED:
+                released_order_ids.append(order.pk)
+
         # 4. PAID -> SHIPPED
         paid_orders = Order.objects.filter(status=Order.OrderStatus.PAID)
         for order in paid_orders:
@@ -34,6 +40,7 @@ def simulate_order_processing():
             else:
                 tx.status = PaymentTransaction.TransactionStatus.FAILED
                 tx.order.status = Order.OrderStatus.FAILED
+                released_order_ids.append(tx.order_id)
             tx.save()
             tx.order.save()
 
@@ -55,4 +62,6 @@ def simulate_order_processing():
                 order=order,
                 amount=total_amount,
                 status=PaymentTransaction.TransactionStatus.NEW
-            )
\ No newline at end of file
+            )
+
+        StockReservation.objects.release(released_order_ids)
@@ -1,3 +1,115 @@
+from decimal import Decimal
+from io import BytesIO
+from unittest import mock
+
+from openpyxl import load_workbook
+
+from django.contrib.auth.models import User
+from django.db import transaction
 from django.test import TestCase
+from django.urls import reverse
+
+from orders.managers import InsufficientStock
+from orders.models import Order, OrderItem, StockReservation
+from orders.tasks import simulate_order_processing
+from payment_transactions.models import PaymentTransaction
+from products.models import Product
+
+
+class StockReservationTests(TestCase):
+    def make_product(self, sku, stock):
+        return Product.objects.create(
+            name=sku,
+            sku=sku,
+            weight=100,
+            calories=600,
+            shelf_life_months=12,
+            ingredients="Nut",
+            price=Decimal("100.00"),
+            stock=stock,
+        )
+
+    def make_order(self, phone):
+        return Order.objects.create(
+            phone=phone,
+            payment_method=Order.PaymentMethod.LIQPAY,
+            delivery_method=Order.DeliveryMethod.PICKUP,
+        )
+
+    def test_reserves_and_releases_stock(self):
+        almond, walnut, untracked = self.make_product("ALMOND", 5), self.make_product("WALNUT", 1), self.make_product("CASHEW", None)
+        order = self.make_order("+38 (099) 000-00-01")
+
+        StockReservation.objects.reserve(order, {almond.pk: 3, walnut.pk: 1, untracked.pk: 10})
+
+        self.assertEqual(
+            list(Product.objects.order_by("sku").values_list("sku", "stock")),
+            [("ALMOND", 2), ("CASHEW", None), ("WALNUT", 0)],
+        )
+        self.assertEqual(order.stock_reservations.count(), 2)
+
+        # Checkout reserves inside its transaction, which the error rolls back.
+        with self.assertRaises(InsufficientStock) as raised, transaction.atomic():
+            StockReservation.objects.reserve(self.make_order("+38 (099) 000-00-02"), {almond.pk: 1, walnut.pk: 1})
+
+        self.assertEqual(raised.exception.product, walnut)
+
+        # Failed payment: simulate_order_processing moves the order to FAILED.
+        PaymentTransaction.objects.create(order=order, amount=0, status=PaymentTransaction.TransactionStatus.PROCESSING)
+
+        with mock.patch("orders.tasks.random.random", return_value=1):
+            simulate_order_processing()
+
+        order.refresh_from_db()
+        self.assertEqual(order.status, Order.OrderStatus.FAILED)
+
+        # The task has already released it; a second release returns nothing.
+        StockReservation.objects.release([order.pk])
+
+        self.assertEqual(dict(Product.objects.values_list("sku", "stock")), {"ALMOND": 5, "WALNUT": 1, "CASHEW": None})
+        self.assertFalse(order.stock_reservations.filter(released_at__isnull=True).exists())
+
+
+class OrderExportTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "secret-password"))
+        product = Product.objects.create(
+            name="Almond",
+            sku="ALMOND",
+            weight=100,
+            calories=600,
+            shelf_life_months=12,
+            ingredients="Almond",
+            price=Decimal("100.00"),
+        )
+        self.order = Order.objects.create(
+            full_name='=HYPERLINK("http://example.com")',
+            phone="+38 (099) 000-00-01",
+            payment_method=Order.PaymentMethod.LIQPAY,
+            delivery_method=Order.DeliveryMethod.PICKUP,
+        )
+        OrderItem.objects.create(order=self.order, product=product, quantity=2, price=Decimal("100.00"))
+
+    def export(self, action):
+        response = self.client.post(reverse("admin:orders_order_changelist"), {
+            "action": action,
+            "index": 0,
+            "_selected_action": [self.order.pk],
+        })
+        return b"".join(response.streaming_content)
+
+    def test_exports_orders_without_formulas(self):
+        lines = self.export("export_csv").decode("utf-8-sig").splitlines()
+
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[0].startswith("ID,"))
+        self.assertIn("ALMOND x 2", lines[1])
+        self.assertIn('"\'=HYPERLINK(""http://example.com"")"', lines[1])
+        self.assertIn("'+38 (099) 000-00-01", lines[1])
+
+        sheet = load_workbook(BytesIO(self.export("export_xlsx"))).active
+        row = [cell for cell in sheet[2]]
 
-# Create your tests here.
+        self.assertEqual(row[6].value, '=HYPERLINK("http://example.com")')
+        self.assertEqual(row[6].data_type, "s")
+        self.assertEqual(row[-1].value, 200)
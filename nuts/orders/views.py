@@ -3,25 +3,28 @@ from django.shortcuts import redirect
 from django.contrib import messages
 from django.db import transaction
 
-from cart.models import Cart
+from core.pages import get_singleton_page
+
+from cart.utils import get_request_cart
 
 from thanks.models import ThanksPage
 
-from orders.models import OrderCheckoutPage
+from orders.managers import InsufficientStock
+from orders.models import OrderCheckoutPage, StockReservation
 from orders.forms import OrderCreateForm, OrderItemFormSet
 
 class OrderCreateView(View):
     def post(self, request):
-        checkout_page = OrderCheckoutPage.objects.live().first()
+        checkout_page = get_singleton_page(OrderCheckoutPage)
         checkout_page_url = checkout_page.get_url(request)
 
-        thanks_page = ThanksPage.objects.live().first()
+        thanks_page = get_singleton_page(ThanksPage)
         thanks_page_url = thanks_page.get_url(request)
 
-        cart = Cart.objects.get_cart_with_totals(request)
+        cart = get_request_cart(request)
         profile = getattr(request.user, 'customer_profile', None)
 
-        if not cart or cart.cart_items_count == 0:
+        if not cart or cart.items_count == 0:
             messages.error(request, "Ваша корзина пуста.")
             return redirect(checkout_page_url)
 
@@ -38,15 +41,24 @@ class OrderCreateView(View):
                     order.save()
 
                     items = formset.save(commit=False)
+                    quantities = {}
                     for item in items:
                         item.order = order
                         item.save()
+                        quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
 
                     cart.delete()
 
+                    # Last before the commit: product rows stay locked from here until it.
+                    StockReservation.objects.reserve(order, quantities)
+
                     messages.success(request, f"Заказ успешно оформлен.")
                     return redirect(thanks_page_url)
 
+            except InsufficientStock as e:
+                messages.error(request, str(e))
+                return redirect(checkout_page_url)
+
             except Exception as e:
                 messages.error(request, f"Произошла ошибка при сохранении заказа: {str(e)}")
                 return redirect(request.META.get('HTTP_REFERER', '/'))
@@ -5,11 +5,12 @@ from wagtail.fields import StreamField
 from wagtail.admin.panels import FieldPanel
 
 from core.blocks import VideoJumbotronBlock, ImageJumbotronBlock
+from core.pages import CachedPageMixin
 
 from .blocks import PaymentAndDeliveryInfoSectionBlock
 
 
-class PaymentAndDeliveryPage(Page):
+class PaymentAndDeliveryPage(CachedPageMixin, Page):
     template = "payment_and_delivery.html"
 
     parent_page_types = ['home.HomePage']
@@ -34,8 +34,7 @@ admin.site.unregister(Tag)
 
 # register Product
 from django import forms
-from django.template.loader import render_to_string
-from django.db.models import Case, When, F, DecimalField
+from django.template.loader import get_template
 
 from django_filters.constants import EMPTY_VALUES
 
@@ -49,6 +48,20 @@ from unfold.contrib.filters.admin import (
 
 from modeltranslation.admin import TabbedTranslationAdmin
 
+from django.contrib import messages
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import reverse
+
+from django.conf import settings
+from django.db.models import Prefetch
+
+from unfold.decorators import action
+
+from core.exports import ExportActionsMixin
+
+from products.forms import ProductImportForm
+from products.importer import import_products
 from products.models import Product, ProductFeature, ProductImage
 
 
@@ -71,14 +84,10 @@ class ProductFeaturesFilter(MultipleDropdownFilter):
     def queryset(self, request, queryset):
         feature_ids = request.GET.getlist(self.parameter_name)
 
-        feature_ids = [f_id for f_id in feature_ids if f_id not in EMPTY_VALUES]
+        feature_ids = [f_id for f_id in feature_ids if f_id not in EMPTY_VALUES and f_id.isdigit()]
 
         if feature_ids:
-
-            for f_id in feature_ids:
-                queryset = queryset.filter(features__id=f_id)
-
-            return queryset.distinct()
+            return queryset.has_all_features(feature_ids)
 
         return queryset
 
@@ -98,13 +107,7 @@ class ProductPriceFilter(RangeNumericListFilter):
             filters["actual_price__lte"] = price_to
 
         if filters:
-            return queryset.annotate(
-                actual_price=Case(
-                    When(discounted_price__isnull=False, then=F('discounted_price')),
-                    default=F('price'),
-                    output_field=DecimalField(),
-                )
-            ).filter(**filters)
+            return queryset.filter(**filters)
 
         return queryset
 
@@ -122,8 +125,17 @@ class ProductAdminForm(forms.ModelForm):
         fields = "__all__"
 
 
+def get_translation_value(field, language):
+    return lambda obj: getattr(obj, f"{field}_{language}")
+
+
+def render_cell(template_name, context):
+    # The cached template loader compiles each cell template once per process.
+    return get_template(template_name).render(context)
+
+
 @admin.register(Product)
-class ProductModelAdmin(ModelAdmin, TabbedTranslationAdmin):
+class ProductModelAdmin(ExportActionsMixin, ModelAdmin, TabbedTranslationAdmin):
     form = ProductAdminForm
 
     inlines = [ProductImageInline]
@@ -141,9 +153,32 @@ class ProductModelAdmin(ModelAdmin, TabbedTranslationAdmin):
         "display_features",
         "display_price",
         "weight",
+        "stock",
         "display_is_new"
     ]
 
+    actions = ["export_csv", "export_xlsx"]
+
+    actions_list = ["import_products_action"]
+
+    # Same columns as the import (products.importer), so an export can be edited and loaded back.
+    export_columns = (
+        [("sku", lambda obj: obj.sku)]
+        + [(f"name_{language}", get_translation_value("name", language)) for language in settings.MODELTRANSLATION_LANGUAGES]
+        + [(f"ingredients_{language}", get_translation_value("ingredients", language)) for language in settings.MODELTRANSLATION_LANGUAGES]
+        + [
+            ("weight", lambda obj: obj.weight),
+            ("calories", lambda obj: obj.calories),
+            ("shelf_life_months", lambda obj: obj.shelf_life_months),
+            ("price", lambda obj: obj.price),
+            ("discounted_price", lambda obj: obj.discounted_price),
+            ("is_new", lambda obj: int(obj.is_new)),
+            ("features", lambda obj: ";".join(
+                getattr(feature, f"name_{settings.MODELTRANSLATION_DEFAULT_LANGUAGE}") for feature in obj.features.all()
+            )),
+        ]
+    )
+
     list_filter_submit = True
 
     list_filter = [
@@ -154,37 +189,68 @@ class ProductModelAdmin(ModelAdmin, TabbedTranslationAdmin):
 
 
     def get_queryset(self, request):
-        return super().get_queryset(request).prefetch_related("images", "features")
+        # Cells only read these prefetches, so the changelist runs the same
+        # number of queries for any page size (see ProductChangelistTests).
+        return super().get_queryset(request).defer(
+            "search_vector_en", "search_vector_ru", "search_vector_uk"
+        ).prefetch_related(
+            Prefetch("images", queryset=ProductImage.objects.order_by("pk")),
+            Prefetch("features", queryset=ProductFeature.objects.order_by("pk")),
+        )
+
+    def get_export_queryset(self, queryset):
+        return queryset.order_by("pk").prefetch_related(None).prefetch_related(
+            Prefetch("features", queryset=ProductFeature.objects.order_by("pk"))
+        )
+
+    @action(description="Импорт из CSV/XLSX", url_path="import", permissions=["add", "change"])
+    def import_products_action(self, request):
+        form = ProductImportForm(request.POST or None, request.FILES or None)
+
+        if request.method == "POST" and form.is_valid():
+            upload = form.cleaned_data["file"]
+            created = updated = failed = 0
+            errors = []
+
+            for result in import_products(upload.file, upload.name):
+                created += result.created
+                updated += result.updated
+                failed += len(result.errors)
+                # Only the first errors are shown, the rest are counted.
+                errors.extend(result.errors[:20 - len(errors)])
+
+            messages.success(request, f"Создано товаров: {created}, обновлено: {updated}")
+
+            for line, message in errors:
+                messages.error(request, f"Строка {line}: {message}")
+
+            if failed > len(errors):
+                messages.error(request, f"И ещё ошибок: {failed - len(errors)}")
+
+            return redirect(reverse("admin:products_product_changelist"))
+
+        return TemplateResponse(request, "unfold/product/import_form.html", {
+            **self.admin_site.each_context(request),
+            "title": "Импорт товаров",
+            "opts": self.model._meta,
+            "form": form,
+        })
 
     @admin.display(description="Фото")
     def display_image(self, obj):
-        first_image = obj.images.first()
-        return render_to_string(
-            template_name="unfold/product/image_field.html",
-            context={"first_image": first_image}
-        )
+        return render_cell("unfold/product/image_field.html", {"first_image": next(iter(obj.images.all()), None)})
 
     @admin.display(description="Особенности")
     def display_features(self, obj):
-        features = obj.features.all()
-        return render_to_string(
-            template_name="unfold/product/features_field.html",
-            context={"features": features}
-        )
+        return render_cell("unfold/product/features_field.html", {"features": obj.features.all()})
 
-    @admin.display(description="Актуальная цена", ordering="price")
+    @admin.display(description="Актуальная цена", ordering="actual_price")
     def display_price(self, obj):
-        return render_to_string(
-            template_name="unfold/product/price_field.html",
-            context={"obj": obj}
-        )
+        return render_cell("unfold/product/price_field.html", {"obj": obj})
 
     @admin.display(description="Новинка", boolean=False)
     def display_is_new(self, obj):
-        return render_to_string(
-            template_name="unfold/product/is_new_field.html",
-            context={"obj": obj}
-        )
+        return render_cell("unfold/product/is_new_field.html", {"obj": obj})
 
 
 @admin.register(ProductFeature)
@@ -0,0 +1,74 @@
+from django import forms
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import FileExtensionValidator
+
+from unfold.widgets import UnfoldAdminFileFieldWidget
+
+LANGUAGES = settings.MODELTRANSLATION_LANGUAGES
+
+
+class FeatureNamesField(forms.CharField):
+    def to_python(self, value):
+        return list(dict.fromkeys(name.strip() for name in super().to_python(value).split(';') if name.strip()))
+
+
+class ProductImportRowForm(forms.Form):
+    """
+    Describes one row of a supplier file. Only the columns present in the
+    file are validated (and later written), so a price list with just sku
+    and price updates prices without touching anything else. Rows are
+    checked with clean_row() rather than by binding a form per row.
+    """
+
+    sku = forms.CharField(max_length=24)
+    weight = forms.IntegerField(min_value=10, max_value=1000)
+    calories = forms.IntegerField(min_value=0)
+    shelf_life_months = forms.IntegerField(min_value=0, max_value=32767)
+    price = forms.DecimalField(max_digits=10, decimal_places=2, min_value=0)
+    discounted_price = forms.DecimalField(max_digits=10, decimal_places=2, min_value=0, required=False)
+    is_new = forms.BooleanField(required=False)
+    features = FeatureNamesField(required=False, help_text="Названия особенностей через «;»")
+
+    @classmethod
+    def for_columns(cls, columns):
+        """
+        Form class validating only the given columns (sku is always required).
+        """
+        form_class = type(cls.__name__, (cls,), {})
+        # Set after class creation, the metaclass would rebuild it from the declared fields.
+        form_class.base_fields = {
+            name: field for name, field in cls.base_fields.items() if name == 'sku' or name in columns
+        }
+        return form_class
+
+    def clean_row(self, data):
+        """
+        Returns (cleaned data, [(field, message)]) for one row, using this
+        (unbound) form's fields.
+        """
+        cleaned_data = {}
+        errors = []
+
+        for name, field in self.fields.items():
+            try:
+                cleaned_data[name] = field.clean(data.get(name, ''))
+            except ValidationError as e:
+                errors.extend((name, message) for message in e.messages)
+
+        return cleaned_data, errors
+
+
+for language in LANGUAGES:
+    required = language == settings.MODELTRANSLATION_DEFAULT_LANGUAGE
+    ProductImportRowForm.base_fields[f'name_{language}'] = forms.CharField(max_length=120, required=required)
+    ProductImportRowForm.base_fields[f'ingredients_{language}'] = forms.CharField(required=required)
+
+
+class ProductImportForm(forms.Form):
+    file = forms.FileField(
+        label="Файл",
+        help_text="CSV (UTF-8) или XLSX, первая строка — названия колонок",
+        validators=[FileExtensionValidator(['csv', 'xlsx'])],
+        widget=UnfoldAdminFileFieldWidget,
+    )
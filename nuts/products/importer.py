@@ -0,0 +1,165 @@
+import csv
+import io
+from collections import namedtuple
+from itertools import islice
+from pathlib import PurePath
+
+from openpyxl import load_workbook
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import translation
+
+from core.exports import unescape_formula
+
+from products.forms import ProductImportRowForm
+from products.models import Product, ProductFeature
+from products.signals import products_imported
+
+LANGUAGES = settings.MODELTRANSLATION_LANGUAGES
+DEFAULT_LANGUAGE = settings.MODELTRANSLATION_DEFAULT_LANGUAGE
+
+# Product columns written by the import, in staging table order. The base
+# name/ingredients columns mirror the default language, as modeltranslation does.
+IMPORT_COLUMNS = (
+    ['sku', 'name', 'ingredients']
+    + [f'name_{language}' for language in LANGUAGES]
+    + [f'ingredients_{language}' for language in LANGUAGES]
+    + ['weight', 'calories', 'shelf_life_months', 'price', 'discounted_price', 'is_new']
+)
+BASE_COLUMNS = {
+    'name': f'name_{DEFAULT_LANGUAGE}',
+    'ingredients': f'ingredients_{DEFAULT_LANGUAGE}',
+}
+# An empty cell in another language keeps the existing translation.
+KEEP_COLUMNS = {
+    f'{field}_{language}'
+    for field in ('name', 'ingredients')
+    for language in LANGUAGES
+    if language != DEFAULT_LANGUAGE
+}
+# Columns a file must have to create products, not just update them.
+REQUIRED_COLUMNS = {
+    f'name_{DEFAULT_LANGUAGE}', f'ingredients_{DEFAULT_LANGUAGE}', 'weight', 'calories', 'shelf_life_months', 'price',
+}
+
+ImportResult = namedtuple('ImportResult', ['created', 'updated', 'errors'])
+
+
+def read_rows(file, name):
+    """
+    Returns the normalized header of a CSV or XLSX file and an iterator of
+    (line number, {column: value}) that reads the file lazily.
+    """
+    if PurePath(name).suffix.lower() == '.xlsx':
+        rows = load_workbook(file, read_only=True, data_only=True).active.iter_rows(values_only=True)
+    else:
+        rows = csv.reader(io.TextIOWrapper(file, encoding='utf-8-sig', newline=''))
+
+    header = [str(column or '').strip().lower() for column in next(rows, ())]
+    header = [BASE_COLUMNS.get(column, column) for column in header]
+
+    def iter_rows():
+        for line, values in enumerate(rows, start=2):
+            values = ['' if value is None else unescape_formula(str(value).strip()) for value in values]
+
+            if any(values):
+                yield line, dict(zip(header, values))
+
+    return header, iter_rows()
+
+
+def resolve_features(names):
+    """
+    {name: id} of the features with the given default-language names,
+    creating the missing ones.
+    """
+    field = f'name_{DEFAULT_LANGUAGE}'
+    features = dict(ProductFeature.objects.filter(**{f'{field}__in': names}).values_list(field, 'id'))
+
+    missing = [name for name in names if name not in features]
+
+    for feature in ProductFeature.objects.bulk_create(ProductFeature(**{field: name}) for name in missing):
+        features[getattr(feature, field)] = feature.pk
+
+    return features
+
+
+def import_batch(header, batch, dry_run=False):
+    form = ProductImportRowForm.for_columns(header)()
+    errors = []
+    cleaned = {}
+
+    for line, data in batch:
+        cleaned_data, row_errors = form.clean_row(data)
+
+        if row_errors:
+            errors.extend((line, f'{field}: {message}') for field, message in row_errors)
+        else:
+            # The last row wins when a SKU repeats.
+            cleaned[cleaned_data['sku']] = (line, cleaned_data)
+
+    missing_columns = REQUIRED_COLUMNS.difference(header)
+
+    if missing_columns and cleaned:
+        existing = set(Product.objects.filter(sku__in=cleaned).values_list('sku', flat=True))
+
+        for sku in set(cleaned) - existing:
+            line, _ = cleaned.pop(sku)
+            errors.append((line, f"Нового товара {sku} нет в базе, а для создания не хватает колонок: "
+                                 f"{', '.join(sorted(missing_columns))}"))
+
+    if not cleaned:
+        return ImportResult(0, 0, errors)
+
+    # Sorted by SKU so that concurrent imports lock rows in the same order.
+    rows = [cleaned[sku][1] for sku in sorted(cleaned)]
+
+    values = []
+
+    for data in rows:
+        data = {**{base: data.get(column) for base, column in BASE_COLUMNS.items()}, **data}
+        values.append([
+            (data.get(column) or None) if column in KEEP_COLUMNS else data.get(column)
+            for column in IMPORT_COLUMNS
+        ])
+
+    update_columns = [
+        column for column in IMPORT_COLUMNS
+        if column != 'sku' and (column in header or BASE_COLUMNS.get(column) in header)
+    ]
+
+    with transaction.atomic():
+        result = Product.objects.upsert_by_sku(IMPORT_COLUMNS, values, update_columns, KEEP_COLUMNS)
+        product_ids = {sku: product_id for product_id, sku, _ in result}
+
+        if 'features' in header:
+            features = resolve_features(sorted({name for data in rows for name in data['features']}))
+            Product.objects.replace_features({
+                product_ids[data['sku']]: [features[name] for name in data['features']] for data in rows
+            })
+
+        if dry_run:
+            transaction.set_rollback(True)
+        else:
+            products_imported.send(sender=Product, product_ids=list(product_ids.values()))
+
+    created = sum(1 for _, _, is_created in result if is_created)
+
+    return ImportResult(created, len(result) - created, errors)
+
+
+def import_products(file, name, batch_size=None, dry_run=False):
+    """
+    Upserts products by SKU from a CSV or XLSX supplier file, one
+    transaction per batch of rows, so memory use does not depend on the
+    file size. Yields an ImportResult per batch; invalid rows are reported
+    in it and skipped.
+    """
+    batch_size = batch_size or settings.PRODUCT_IMPORT_BATCH_SIZE
+    header, rows = read_rows(file, name)
+
+    # Unlocalized lookups and the new features' names go to the default language.
+    with translation.override(DEFAULT_LANGUAGE):
+        while batch := list(islice(rows, batch_size)):
+            yield import_batch(header, batch, dry_run)
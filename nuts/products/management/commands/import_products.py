@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from products.importer import import_products
+
+
+class Command(BaseCommand):
+    help = 'Загружает и обновляет товары (по артикулу) из CSV или XLSX файла поставщика'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--dry-run', action='store_true', help='Проверить файл, ничего не сохраняя')
+
+    def handle(self, *args, **options):
+        created = updated = failed = 0
+
+        try:
+            file = open(options['path'], 'rb')
+        except OSError as e:
+            raise CommandError(e)
+
+        with file:
+            for result in import_products(file, options['path'], options['batch_size'], options['dry_run']):
+                created += result.created
+                updated += result.updated
+                failed += len(result.errors)
+
+                for line, message in result.errors:
+                    self.stderr.write(f'Строка {line}: {message}')
+
+                self.stdout.write(f'Создано: {created}, обновлено: {updated}, ошибок: {failed}')
+
+        if options['dry_run']:
+            self.stdout.write('Пробный запуск, изменения не сохранены')
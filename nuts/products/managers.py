@@ -0,0 +1,245 @@
+import csv
+import io
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db import models, connections, transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import Greatest
+from django.utils import translation
+
+# Postgres text search configuration per modeltranslation language.
+# There is no bundled Ukrainian stemmer, so "uk" falls back to "simple".
+SEARCH_CONFIGS = {
+    'en': 'english',
+    'ru': 'russian',
+    'uk': 'simple',
+}
+
+
+def get_search_language(language=None):
+    language = language or translation.get_language() or settings.MODELTRANSLATION_DEFAULT_LANGUAGE
+    language = language.split('-')[0]
+
+    if language not in SEARCH_CONFIGS:
+        language = settings.MODELTRANSLATION_DEFAULT_LANGUAGE
+
+    return language
+
+
+class ProductQuerySet(models.QuerySet):
+    def has_all_features(self, feature_ids):
+        """
+        Products linked to every one of feature_ids. Uses one grouped
+        subquery on the link table (HAVING COUNT = n) instead of a join per
+        feature, and needs no distinct().
+        """
+        feature_ids = {int(feature_id) for feature_id in feature_ids}
+
+        if not feature_ids:
+            return self
+
+        matching = self.model.features.through.objects.filter(
+            productfeature_id__in=feature_ids
+        ).values('product_id').annotate(
+            matched=Count('productfeature_id')
+        ).filter(matched=len(feature_ids)).values('product_id')
+
+        return self.filter(id__in=matching)
+
+    def search(self, query, language=None):
+        """
+        Full-text search over the stored search vector of the given (or the
+        active) language, best matches first.
+        """
+        language = get_search_language(language)
+        field = f'search_vector_{language}'
+        search_query = SearchQuery(query, config=SEARCH_CONFIGS[language], search_type='websearch')
+
+        return self.filter(**{field: search_query}).annotate(
+            rank=SearchRank(F(field), search_query)
+        ).order_by('-rank', '-id')
+
+
+class ProductManager(models.Manager.from_queryset(ProductQuerySet)):
+    def autocomplete(self, query, limit, language=None, threshold=None):
+        """
+        Typeahead matches for a partial, possibly misspelled name or SKU, using
+        the pg_trgm indexes on name_<language> and sku. Returns up to limit
+        products, best matches first. threshold overrides
+        pg_trgm.word_similarity_threshold (0.6) for this query only.
+        """
+        field = f'name_{get_search_language(language)}'
+
+        queryset = self.filter(
+            Q(**{f'{field}__trigram_word_similar': query}) | Q(sku__trigram_word_similar=query)
+        ).annotate(
+            similarity=Greatest(TrigramWordSimilarity(query, field), TrigramWordSimilarity(query, 'sku'))
+        ).order_by('-similarity', 'id')[:limit]
+
+        with transaction.atomic(using=self.db):
+            if threshold is not None:
+                with connections[self.db].cursor() as cursor:
+                    cursor.execute("SELECT set_config('pg_trgm.word_similarity_threshold', %s, true)", [str(threshold)])
+
+            return list(queryset)
+
+    def take_stock(self, product_id, quantity):
+        """
+        Decrements the stock of one product by quantity with a single
+        conditional UPDATE (... WHERE stock >= quantity), so there is no
+        read-modify-write to race with. Returns False if not enough is left.
+        """
+        return bool(self.filter(id=product_id, stock__gte=quantity).update(stock=F('stock') - quantity))
+
+    def return_stock(self, quantities):
+        """
+        Adds {product_id: quantity} back to stock-tracked products, in
+        product id order like the checkout takes it.
+        """
+        for product_id in sorted(quantities):
+            self.filter(id=product_id, stock__isnull=False).update(stock=F('stock') + quantities[product_id])
+
+    def refresh_search_vectors(self, product_ids=None):
+        """
+        Rebuilds search_vector_<language> from name, SKU, feature names and
+        ingredients in one UPDATE. product_ids=None refreshes every product.
+        """
+        ProductFeature = self.model.features.rel.model
+        through = self.model.features.through
+        table = self.model._meta.db_table
+
+        vectors = []
+        feature_names = []
+
+        for language, config in SEARCH_CONFIGS.items():
+            vectors.append(
+                f"""
+                search_vector_{language} =
+                    setweight(to_tsvector('{config}', COALESCE(product.name_{language}, product.name, '')), 'A')
+                    || setweight(to_tsvector('simple', product.sku), 'A')
+                    || setweight(to_tsvector('{config}', COALESCE(features.names_{language}, '')), 'B')
+                    || setweight(to_tsvector('{config}', COALESCE(product.ingredients_{language}, product.ingredients, '')), 'C')
+                """
+            )
+            feature_names.append(
+                f"STRING_AGG(COALESCE(feature.name_{language}, feature.name), ' ') AS names_{language}"
+            )
+
+        where = "TRUE" if product_ids is None else "p.id = ANY(%s)"
+        params = [] if product_ids is None else [list(product_ids)]
+
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(
+                f"""
+                UPDATE {table} product
+                SET {', '.join(vectors)}
+                FROM (
+                    SELECT p.id, {', '.join(feature_names)}
+                    FROM {table} p
+                    LEFT JOIN {through._meta.db_table} link ON link.product_id = p.id
+                    LEFT JOIN {ProductFeature._meta.db_table} feature ON feature.id = link.productfeature_id
+                    WHERE {where}
+                    GROUP BY p.id
+                ) features
+                WHERE product.id = features.id
+                """,
+                params
+            )
+            return cursor.rowcount
+
+    def upsert_by_sku(self, columns, rows, update_columns, keep_columns=()):
+        """
+        COPYs rows (tuples in `columns` order, sku included, unique SKUs) into
+        a temporary staging table and upserts them by SKU in one statement.
+        Existing products only get update_columns written, and keep_columns
+        keep their current value where the row has NULL. New products need
+        every NOT NULL column in update_columns. Must run inside a
+        transaction. Returns [(id, sku, created)].
+        """
+        connection = connections[self.db]
+        table = self.model._meta.db_table
+        fields = [self.model._meta.get_field(column) for column in columns]
+        column_names = ', '.join(field.column for field in fields)
+
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+
+        # Postgres checks NOT NULL before resolving the conflict, so columns
+        # left out of the update are taken from the existing row, and fields
+        # with a default (is_new) fall back to it for new products.
+        values = []
+        params = []
+
+        for field in fields:
+            source = 'staging' if field.name == 'sku' or field.name in update_columns else 'existing'
+
+            if field.has_default() and not callable(field.default):
+                values.append(f"COALESCE({source}.{field.column}, %s)")
+                params.append(field.get_default())
+            else:
+                values.append(f"{source}.{field.column}")
+
+        updates = [
+            f"{column} = COALESCE(EXCLUDED.{column}, {table}.{column})" if column in keep_columns
+            else f"{column} = EXCLUDED.{column}"
+            for column in update_columns
+        ]
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                CREATE TEMPORARY TABLE product_import_staging (
+                    {', '.join(f'{field.column} {field.db_type(connection)}' for field in fields)}
+                ) ON COMMIT DROP
+                """
+            )
+            cursor.copy_expert(
+                f"COPY product_import_staging ({column_names}) FROM STDIN WITH (FORMAT csv)",
+                buffer
+            )
+            cursor.execute(
+                f"""
+                INSERT INTO {table} ({column_names}, created_at, updated_at)
+                SELECT {', '.join(values)}, NOW(), NOW()
+                FROM product_import_staging staging
+                LEFT JOIN {table} existing ON existing.sku = staging.sku
+                ON CONFLICT (sku) DO UPDATE
+                SET {', '.join(updates + ['updated_at = NOW()'])}
+                RETURNING id, sku, xmax = 0
+                """,
+                params
+            )
+            result = cursor.fetchall()
+            cursor.execute("DROP TABLE product_import_staging")
+
+        return result
+
+    def replace_features(self, feature_ids_by_product):
+        """
+        Sets the features of the given products ({product_id: feature ids})
+        in two statements, replacing their current links.
+        """
+        through = self.model.features.through._meta.db_table
+        links = [
+            (product_id, feature_id)
+            for product_id, feature_ids in feature_ids_by_product.items()
+            for feature_id in feature_ids
+        ]
+
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {through} WHERE product_id = ANY(%s)",
+                [list(feature_ids_by_product)]
+            )
+
+            if links:
+                cursor.execute(
+                    f"""
+                    INSERT INTO {through} (product_id, productfeature_id)
+                    SELECT * FROM UNNEST(%s::bigint[], %s::bigint[])
+                    ON CONFLICT DO NOTHING
+                    """,
+                    [[product_id for product_id, _ in links], [feature_id for _, feature_id in links]]
+                )
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.9 on 2026-10-18 18:36
+
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_alter_product_weight'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='actual_price',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.comparison.Coalesce('discounted_price', 'price'), output_field=models.DecimalField(decimal_places=2, max_digits=10), verbose_name='Актуальная цена'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['actual_price', 'id'], name='product_actual_price_idx'),
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 5.2.9 on 2026-10-18 18:41
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_product_created_at_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_vector_en',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='search_vector_ru',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='search_vector_uk',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector_en'], name='product_search_en_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector_ru'], name='product_search_ru_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector_uk'], name='product_search_uk_idx'),
+        ),
+        migrations.RunSQL(
+            sql="""
+                UPDATE products_product product
+                SET
+                    search_vector_en =
+                        setweight(to_tsvector('english', COALESCE(product.name_en, product.name, '')), 'A')
+                        || setweight(to_tsvector('simple', product.sku), 'A')
+                        || setweight(to_tsvector('english', COALESCE(features.names_en, '')), 'B')
+                        || setweight(to_tsvector('english', COALESCE(product.ingredients_en, product.ingredients, '')), 'C'),
+                    search_vector_ru =
+                        setweight(to_tsvector('russian', COALESCE(product.name_ru, product.name, '')), 'A')
+                        || setweight(to_tsvector('simple', product.sku), 'A')
+                        || setweight(to_tsvector('russian', COALESCE(features.names_ru, '')), 'B')
+                        || setweight(to_tsvector('russian', COALESCE(product.ingredients_ru, product.ingredients, '')), 'C'),
+                    search_vector_uk =
+                        setweight(to_tsvector('simple', COALESCE(product.name_uk, product.name, '')), 'A')
+                        || setweight(to_tsvector('simple', product.sku), 'A')
+                        || setweight(to_tsvector('simple', COALESCE(features.names_uk, '')), 'B')
+                        || setweight(to_tsvector('simple', COALESCE(product.ingredients_uk, product.ingredients, '')), 'C')
+                FROM (
+                    SELECT
+                        p.id,
+                        STRING_AGG(COALESCE(feature.name_en, feature.name), ' ') AS names_en,
+                        STRING_AGG(COALESCE(feature.name_ru, feature.name), ' ') AS names_ru,
+                        STRING_AGG(COALESCE(feature.name_uk, feature.name), ' ') AS names_uk
+                    FROM products_product p
+                    LEFT JOIN products_product_features link ON link.product_id = p.id
+                    LEFT JOIN products_productfeature feature ON feature.id = link.productfeature_id
+                    GROUP BY p.id
+                ) features
+                WHERE product.id = features.id;
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-18 19:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0009_productimage_renditions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='stock',
+            field=models.PositiveIntegerField(blank=True, help_text='Пусто — остаток не учитывается', null=True, verbose_name='Остаток на складе'),
+        ),
+    ]
@@ -1,14 +1,27 @@
+import hashlib
+
+from django.conf import settings
 from django.contrib import messages
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.http import Http404
+from django.shortcuts import redirect
+from django.utils import translation
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
 
 from wagtail.models import Page
+from wagtail.contrib.routable_page.models import RoutablePageMixin, path, re_path
 from wagtail.fields import StreamField
 from wagtail.admin.panels import FieldPanel
 from .blocks import ProductImageWithTextBlock
+from .managers import ProductManager
 
 
-class ProductPage(Page):
+class ProductPage(RoutablePageMixin, Page):
     parent_page_types = ['shop.ShopPage']
     subpage_types = []
     max_count = 1
@@ -45,23 +58,92 @@ class ProductPage(Page):
         FieldPanel("delivery_info")
     ]
 
-    def get_context(self, request, *args, **kwargs):
-        context = super().get_context(request, *args, **kwargs)
+    def get_product_url(self, request, product):
+        return self.get_url(request) + self.reverse_subpage("product", args=[product.sku])
+
+    def is_product_page_shared(self, request):
+        # Logged in visitors see their own menu and pending messages are
+        # shown once, as in CachedPageMixin.is_page_cacheable.
+        return not request.user.is_authenticated and not len(messages.get_messages(request))
+
+    def get_product_etag(self, request, product, shared):
+        """
+        The shared copy loads the header cart with HTMX and has no CSRF
+        token, so its ETag only covers the product and the page revision.
+        A visitor's own copy embeds both, so its ETag also covers their
+        cart, user and CSRF cookie.
+        """
+        from cart.storage import get_cart_storage
+
+        parts = [
+            product.pk,
+            product.updated_at.isoformat(),
+            self.last_published_at.isoformat() if self.last_published_at else "",
+            translation.get_language(),
+        ]
 
-        product_id = request.GET.get('product_id')
+        if not shared:
+            parts += [
+                request.user.pk or "",
+                request.COOKIES.get(settings.CSRF_COOKIE_NAME, ""),
+                get_cart_storage().get_cart_fingerprint(request),
+            ]
+
+        return hashlib.md5(":".join(map(str, parts)).encode()).hexdigest()
+
+    @path("")
+    def product_index(self, request):
+        # Old links carried the product in the query string.
+        product_id = request.GET.get("product_id")
 
         if not product_id:
             messages.error(request, "Не указан идентфикатор товара.")
-            return context
+            return self.render(request)
 
         try:
-            product = Product.objects.prefetch_related('images', 'features').get(pk=product_id)
-            context['product'] = product
-            return context
-
-        except Product.DoesNotExist:
+            product = Product.objects.only("sku").get(pk=product_id)
+        except (Product.DoesNotExist, ValueError):
             messages.error(request, "Товар с указаным идентификатором не обнаружен.")
-            return context
+            return self.render(request)
+
+        return redirect(self.get_product_url(request, product), permanent=True)
+
+    @re_path(r"^(?P<sku>[^/]+)/$", name="product")
+    def product_detail(self, request, sku):
+        # Images and features are only loaded when the cached fragment in
+        # product.html misses, so no prefetch here.
+        product = Product.objects.filter(sku=sku).first()
+
+        if product is None:
+            raise Http404("Product not found.")
+
+        shared = self.is_product_page_shared(request)
+        etag = quote_etag(self.get_product_etag(request, product, shared))
+        last_modified = max(filter(None, [product.updated_at, self.last_published_at]))
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified.timestamp())
+
+        if response is None:
+            response = self.render(
+                request,
+                context_overrides={
+                    "product": product,
+                    "product_cache_timeout": settings.SHOP_PRODUCT_CACHE_TIMEOUT,
+                    "cart_fragments": shared,
+                },
+            )
+
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+
+        if shared:
+            patch_cache_control(response, public=True, max_age=settings.PRODUCT_PAGE_CACHE_MAX_AGE)
+            # Logging in changes the session cookie and with it the copy.
+            patch_vary_headers(response, ("Cookie",))
+        else:
+            patch_cache_control(response, private=True, no_cache=True)
+
+        return response
 
     class Meta:
         verbose_name = "Product page"
@@ -130,6 +212,20 @@ class Product(models.Model):
         blank=True,
         verbose_name="Цена со скидкой"
     )
+    actual_price = models.GeneratedField(
+        expression=Coalesce("discounted_price", "price"),
+        output_field=models.DecimalField(max_digits=10, decimal_places=2),
+        db_persist=True,
+        verbose_name="Актуальная цена"
+    )
+    # Decremented by checkout (orders.managers.StockReservationManager),
+    # NULL for products that are not stock-tracked.
+    stock = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name="Остаток на складе",
+        help_text="Пусто — остаток не учитывается"
+    )
     created_at = models.DateTimeField(
         auto_now_add=True,
         verbose_name="Дата создания"
@@ -138,11 +234,29 @@ class Product(models.Model):
         auto_now=True,
         verbose_name="Дата обновления"
     )
+    # Kept up to date by products.signals (ProductManager.refresh_search_vectors).
+    search_vector_en = SearchVectorField(null=True, editable=False)
+    search_vector_ru = SearchVectorField(null=True, editable=False)
+    search_vector_uk = SearchVectorField(null=True, editable=False)
+
+    objects = ProductManager()
 
     class Meta:
         verbose_name = "Товар"
         verbose_name_plural = "Товары"
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['actual_price', 'id'], name='product_actual_price_idx'),
+            models.Index(fields=['-created_at', '-id'], name='product_created_at_idx'),
+            GinIndex(fields=['search_vector_en'], name='product_search_en_idx'),
+            GinIndex(fields=['search_vector_ru'], name='product_search_ru_idx'),
+            GinIndex(fields=['search_vector_uk'], name='product_search_uk_idx'),
+            # Typeahead (search.views.autocomplete) matches with pg_trgm operators.
+            GinIndex(fields=['name_en'], opclasses=['gin_trgm_ops'], name='product_name_en_trgm_idx'),
+            GinIndex(fields=['name_ru'], opclasses=['gin_trgm_ops'], name='product_name_ru_trgm_idx'),
+            GinIndex(fields=['name_uk'], opclasses=['gin_trgm_ops'], name='product_name_uk_trgm_idx'),
+            GinIndex(fields=['sku'], opclasses=['gin_trgm_ops'], name='product_sku_trgm_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -160,7 +274,28 @@ class ProductImage(models.Model):
         upload_to='product_images/',
         verbose_name="Изображение"
     )
+    # WebP copies of the image, {width: storage name}, filled in by
+    # products.tasks.generate_product_image_renditions after each upload.
+    renditions = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name="Версии изображения"
+    )
 
     class Meta:
         verbose_name = "Изображение товара"
         verbose_name_plural = "Изображения товаров"
+
+    def get_rendition_url(self, width):
+        """
+        URL of the smallest rendition at least `width` pixels wide (or the
+        largest one), falling back to the original until they are generated.
+        """
+        if not self.renditions:
+            return self.image.url
+
+        widths = sorted(map(int, self.renditions))
+        chosen = next((w for w in widths if w >= width), widths[-1])
+
+        return self.image.storage.url(self.renditions[str(chosen)])
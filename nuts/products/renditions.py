@@ -0,0 +1,62 @@
+import hashlib
+import posixpath
+from io import BytesIO
+
+from PIL import Image, ImageOps
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+
+RENDITIONS_DIR = 'product_images/renditions'
+
+
+def get_rendition_widths(original_width):
+    # Never upscale: widths above the original collapse into the original width.
+    return sorted({min(width, original_width) for width in settings.PRODUCT_IMAGE_RENDITION_WIDTHS})
+
+
+def get_rendition_name(image_name, width):
+    # The hash of the full name keeps walnut.jpg and walnut.png (or the same
+    # file name in another folder) from sharing renditions.
+    stem = posixpath.splitext(posixpath.basename(image_name))[0]
+    digest = hashlib.md5(image_name.encode()).hexdigest()[:8]
+    return f'{RENDITIONS_DIR}/{stem}-{digest}-{width}w.webp'
+
+
+def make_renditions(product_image):
+    """
+    Saves WebP copies of product_image.image in the configured widths next
+    to the original and returns them as {width: storage name}.
+    """
+    field = product_image.image
+    storage = field.storage
+
+    with field.open('rb') as file:
+        original = ImageOps.exif_transpose(Image.open(file))
+        original.load()
+
+    if original.mode not in ('RGB', 'RGBA'):
+        original = original.convert('RGBA' if original.has_transparency_data else 'RGB')
+
+    renditions = {}
+
+    for width in get_rendition_widths(original.width):
+        height = max(1, round(original.height * width / original.width))
+        resized = original if width == original.width else original.resize((width, height), Image.Resampling.LANCZOS)
+
+        buffer = BytesIO()
+        resized.save(buffer, 'WEBP', quality=settings.PRODUCT_IMAGE_WEBP_QUALITY, method=6)
+
+        name = get_rendition_name(field.name, width)
+
+        if storage.exists(name):
+            storage.delete(name)
+
+        renditions[str(width)] = storage.save(name, ContentFile(buffer.getvalue()))
+
+    return renditions
+
+
+def delete_renditions(storage, names):
+    for name in names:
+        storage.delete(name)
@@ -0,0 +1,60 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import Signal, receiver
+
+from products.models import Product, ProductFeature, ProductImage
+from products.renditions import delete_renditions
+from products.tasks import generate_product_image_renditions
+
+# Sent with product_ids after Product rows were written in bulk with raw SQL
+# (products.importer), which bypasses post_save.
+products_imported = Signal()
+
+
+@receiver(post_save, sender=Product)
+def refresh_product_search_vector(sender, instance, **kwargs):
+    Product.objects.refresh_search_vectors([instance.pk])
+
+
+@receiver(products_imported)
+def refresh_search_vectors_on_import(sender, product_ids, **kwargs):
+    Product.objects.refresh_search_vectors(product_ids)
+
+
+@receiver(m2m_changed, sender=Product.features.through)
+def refresh_search_vectors_on_features_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        Product.objects.refresh_search_vectors([instance.pk])
+    elif pk_set:
+        Product.objects.refresh_search_vectors(pk_set)
+    else:
+        # Cleared from the feature side: the affected products are unknown here.
+        Product.objects.refresh_search_vectors()
+
+
+@receiver(post_save, sender=ProductFeature)
+def refresh_search_vectors_on_feature_rename(sender, instance, created, **kwargs):
+    if created:
+        return
+
+    Product.objects.refresh_search_vectors(instance.product_set.values_list('id', flat=True))
+
+
+@receiver(post_save, sender=ProductImage)
+def generate_renditions_on_upload(sender, instance, update_fields=None, **kwargs):
+    # The task itself saves with update_fields=['renditions'].
+    if update_fields is not None and 'image' not in update_fields:
+        return
+
+    transaction.on_commit(lambda: generate_product_image_renditions.delay(instance.pk))
+
+
+@receiver(post_delete, sender=ProductImage)
+def delete_renditions_on_image_delete(sender, instance, **kwargs):
+    names = list(instance.renditions.values())
+
+    if names:
+        transaction.on_commit(lambda: delete_renditions(instance.image.storage, names))
@@ -0,0 +1,27 @@
+from celery import shared_task
+from django.utils import timezone
+
+from products.models import Product, ProductImage
+from products.renditions import delete_renditions, make_renditions
+
+
+@shared_task
+def generate_product_image_renditions(image_id):
+    """
+    Builds the WebP renditions of a ProductImage and drops the ones left
+    over from a previously uploaded file.
+    """
+    product_image = ProductImage.objects.filter(pk=image_id).first()
+
+    if product_image is None or not product_image.image:
+        return
+
+    previous = set(product_image.renditions.values())
+    product_image.renditions = make_renditions(product_image)
+
+    delete_renditions(product_image.image.storage, previous - set(product_image.renditions.values()))
+
+    # post_save invalidates the cached catalog (shop.signals); touching the
+    # product invalidates its cached detail fragment and ETag.
+    product_image.save(update_fields=['renditions'])
+    Product.objects.filter(pk=product_image.product_id).update(updated_at=timezone.now())
@@ -0,0 +1,16 @@
+from django import template
+
+register = template.Library()
+
+
+@register.filter
+def srcset(product_image):
+    return ', '.join(
+        f'{product_image.image.storage.url(name)} {width}w'
+        for width, name in sorted(product_image.renditions.items(), key=lambda item: int(item[0]))
+    )
+
+
+@register.filter
+def rendition_url(product_image, width):
+    return product_image.get_rendition_url(int(width))
@@ -1,3 +1,286 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from decimal import Decimal
+from io import BytesIO
 
-# Create your tests here.
+from openpyxl import Workbook
+from PIL import Image
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from wagtail.models import Page, Site
+
+from home.models import HomePage
+
+from products.importer import import_products
+from products.models import Product, ProductFeature, ProductImage, ProductPage
+from products.tasks import generate_product_image_renditions
+from products.templatetags.products_tags import srcset
+from shop.models import ShopPage
+
+
+class ProductImageRenditionsTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+
+        settings_override = override_settings(MEDIA_ROOT=self.media_root, PRODUCT_IMAGE_RENDITION_WIDTHS=[320, 640, 960])
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def upload(self, width, height, name='almond.jpg', format='JPEG'):
+        buffer = BytesIO()
+        Image.new('RGB', (width, height), 'brown').save(buffer, format)
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type=f'image/{format.lower()}')
+
+    def make_product(self):
+        return Product.objects.create(
+            name="Миндаль",
+            sku="ALMOND",
+            weight=100,
+            calories=600,
+            shelf_life_months=12,
+            ingredients="Миндаль",
+            price=Decimal("100.00"),
+        )
+
+    def test_generates_webp_renditions_without_upscaling(self):
+        product_image = ProductImage.objects.create(product=self.make_product(), image=self.upload(800, 400))
+
+        self.assertEqual(product_image.get_rendition_url(640), product_image.image.url)
+
+        generate_product_image_renditions(product_image.pk)
+        product_image.refresh_from_db()
+
+        self.assertEqual(sorted(product_image.renditions, key=int), ['320', '640', '800'])
+
+        with product_image.image.storage.open(product_image.renditions['320']) as file:
+            rendition = Image.open(file)
+            self.assertEqual((rendition.format, rendition.size), ('WEBP', (320, 160)))
+
+        self.assertTrue(product_image.get_rendition_url(400).endswith('-640w.webp'))
+        self.assertTrue(product_image.get_rendition_url(2000).endswith('-800w.webp'))
+        self.assertEqual(srcset(product_image).count('w, '), 2)
+
+    def test_images_with_the_same_file_name_keep_their_own_renditions(self):
+        product = self.make_product()
+        jpeg = ProductImage.objects.create(product=product, image=self.upload(400, 200, 'walnut.jpg'))
+        png = ProductImage.objects.create(product=product, image=self.upload(400, 400, 'walnut.png', 'PNG'))
+
+        for product_image in (jpeg, png):
+            generate_product_image_renditions(product_image.pk)
+            product_image.refresh_from_db()
+
+        self.assertFalse(set(jpeg.renditions.values()) & set(png.renditions.values()))
+
+        with jpeg.image.storage.open(jpeg.renditions['320']) as file:
+            self.assertEqual(Image.open(file).size, (320, 160))
+
+
+class ProductFeaturesLookupTests(TestCase):
+    def test_has_all_features(self):
+        raw, vegan, salted = ProductFeature.objects.bulk_create(
+            ProductFeature(name_en=name) for name in ("Raw", "Vegan", "Salted")
+        )
+        products = Product.objects.bulk_create(
+            Product(
+                name_en=f"Nut {i}",
+                sku=f"NUT-{i}",
+                weight=100,
+                calories=600,
+                shelf_life_months=12,
+                ingredients_en="Nut",
+                price=Decimal("100.00"),
+            )
+            for i in range(3)
+        )
+        products[0].features.add(raw, vegan, salted)
+        products[1].features.add(raw, vegan)
+        products[2].features.add(raw)
+
+        self.assertEqual(set(Product.objects.has_all_features([raw.pk])), set(products))
+        self.assertEqual(set(Product.objects.has_all_features([raw.pk, vegan.pk])), set(products[:2]))
+        self.assertEqual(list(Product.objects.has_all_features([vegan.pk, salted.pk, vegan.pk])), products[:1])
+        self.assertEqual(Product.objects.has_all_features([]).count(), 3)
+
+
+class ProductImportTests(TestCase):
+    def run_import(self, content, name='products.csv', **kwargs):
+        results = list(import_products(BytesIO(content), name, **kwargs))
+        return (
+            sum(result.created for result in results),
+            sum(result.updated for result in results),
+            [error for result in results for error in result.errors],
+        )
+
+    def test_upserts_by_sku_in_batches(self):
+        Product.objects.create(
+            name_en="Old walnut",
+            name_ru="Грецкий орех",
+            sku="WALNUT",
+            weight=100,
+            calories=650,
+            shelf_life_months=12,
+            ingredients_en="Walnut",
+            price=Decimal("90.00"),
+        )
+
+        csv_content = (
+            "sku,name,name_ru,ingredients,weight,calories,shelf_life_months,price,features\n"
+            "WALNUT,Walnut,,Walnut,200,654,12,150.00,Vegan;Raw\n"
+            "ALMOND,Almond,Миндаль,Almond,100,579,12,120.00,Raw\n"
+            "CASHEW,Cashew,,Cashew,5,553,12,130.00,\n"
+        ).encode()
+
+        created, updated, errors = self.run_import(csv_content, batch_size=2)
+
+        self.assertEqual((created, updated), (1, 1))
+        self.assertEqual([line for line, _ in errors], [4])
+
+        walnut = Product.objects.get(sku="WALNUT")
+        self.assertEqual((walnut.name_en, walnut.name_ru, walnut.weight), ("Walnut", "Грецкий орех", 200))
+        self.assertEqual(sorted(walnut.features.values_list("name_en", flat=True)), ["Raw", "Vegan"])
+        self.assertEqual(ProductFeature.objects.count(), 2)
+        self.assertEqual(list(Product.objects.search("almond", language="en")), [Product.objects.get(sku="ALMOND")])
+
+        workbook = Workbook()
+        workbook.active.append(["SKU", "price", "discounted_price"])
+        workbook.active.append(["WALNUT", 160, 140.5])
+        workbook.active.append(["PECAN", 200, None])
+        buffer = BytesIO()
+        workbook.save(buffer)
+
+        created, updated, errors = self.run_import(buffer.getvalue(), 'prices.xlsx')
+
+        self.assertEqual((created, updated, len(errors)), (0, 1, 1))
+
+        walnut.refresh_from_db()
+        self.assertEqual((walnut.price, walnut.actual_price, walnut.weight), (Decimal("160.00"), Decimal("140.50"), 200))
+        self.assertEqual(walnut.features.count(), 2)
+
+
+class ProductExportTests(TestCase):
+    def export(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse("admin:products_product_changelist"), {
+                "action": "export_csv",
+                "select_across": 1,
+                "index": 0,
+                "_selected_action": Product.objects.values_list("pk", flat=True)[:1],
+            })
+            content = b"".join(response.streaming_content).decode("utf-8-sig")
+
+        return content.splitlines(), len(queries)
+
+    @override_settings(ADMIN_EXPORT_CHUNK_SIZE=10)
+    def test_export_queries_grow_per_chunk_not_per_row(self):
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "secret-password"))
+        features = ProductFeature.objects.bulk_create(ProductFeature(name_en=name) for name in ("Raw", "Vegan"))
+        query_counts = []
+
+        for size in (10, 20):
+            products = Product.objects.bulk_create(
+                Product(
+                    name_en=f"Nut {size}-{i}",
+                    sku=f"NUT-{size}-{i}",
+                    weight=100,
+                    calories=600,
+                    shelf_life_months=12,
+                    ingredients_en="Nut",
+                    price=Decimal("100.00"),
+                )
+                for i in range(size // 2)
+            )
+            Product.features.through.objects.bulk_create(
+                Product.features.through(product=product, productfeature=feature)
+                for product in products for feature in features
+            )
+
+            lines, query_count = self.export()
+            query_counts.append(query_count)
+
+        self.assertEqual(len(lines), 16)
+        self.assertTrue(lines[0].startswith("sku,name_en,name_ru,name_uk,"))
+        self.assertTrue(lines[1].endswith(",Raw;Vegan"))
+        # 5 -> 15 rows is one more chunk of the cursor, so one more features prefetch.
+        self.assertEqual(query_counts[1] - query_counts[0], 1)
+
+
+class ProductChangelistTests(TestCase):
+    def add_products(self, count, features):
+        products = Product.objects.bulk_create(
+            Product(
+                name_en=f"Nut {i}",
+                sku=f"NUT-{Product.objects.count()}-{i}",
+                weight=100,
+                calories=600,
+                shelf_life_months=12,
+                ingredients_en="Nut",
+                price=Decimal("100.00"),
+                discounted_price=Decimal("90.00") if i % 2 else None,
+                is_new=bool(i % 3),
+            )
+            for i in range(count)
+        )
+        ProductImage.objects.bulk_create(
+            ProductImage(product=product, image=f"product_images/nut-{product.pk}-{n}.jpg")
+            for product in products for n in range(2)
+        )
+        Product.features.through.objects.bulk_create(
+            Product.features.through(product=product, productfeature=feature)
+            for product in products for feature in features
+        )
+
+    def test_changelist_query_count_does_not_depend_on_page_size(self):
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "secret-password"))
+        features = ProductFeature.objects.bulk_create(ProductFeature(name_en=name) for name in ("Raw", "Vegan"))
+        query_counts = []
+
+        for added, total in ((5, 5), (45, 50)):
+            self.add_products(added, features)
+
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse("admin:products_product_changelist"))
+
+            # One thumbnail (the first image) per row.
+            self.assertContains(response, "/media/product_images/nut-", count=total)
+            query_counts.append(len(queries))
+
+        self.assertEqual(query_counts[0], query_counts[1], query_counts)
+
+
+class ProductDetailCacheTests(TestCase):
+    def setUp(self):
+        home = Page.get_first_root_node().add_child(instance=HomePage(title="Home", slug="home"))
+        Site.objects.all().delete()
+        Site.objects.create(hostname="testserver", root_page=home, is_default_site=True)
+        shop = home.add_child(instance=ShopPage(title="Shop", slug="shop"))
+        self.product_page = shop.add_child(instance=ProductPage(title="Product", slug="product"))
+        self.product = Product.objects.create(
+            name="Миндаль",
+            sku="ALMOND",
+            weight=100,
+            calories=600,
+            shelf_life_months=12,
+            ingredients="Миндаль",
+            price=Decimal("100.00"),
+        )
+
+    def test_anonymous_visitors_share_one_copy(self):
+        url = self.product_page.get_product_url(None, self.product)
+
+        response = self.client.get(url)
+        self.assertEqual(response["Cache-Control"], "public, max-age=300")
+        self.assertNotIn(settings.CSRF_COOKIE_NAME, response.cookies)
+        # The header cart is loaded separately.
+        self.assertContains(response, reverse("cart:counter"))
+
+        self.client.force_login(User.objects.create_user("customer", "customer@example.com", "secret-password"))
+        response = self.client.get(url)
+        self.assertEqual(response["Cache-Control"], "private, no-cache")
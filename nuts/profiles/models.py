@@ -6,6 +6,8 @@ from wagtail.models import Page
 from wagtail.admin.panels import FieldPanel
 from wagtail.images.models import Image
 
+from core.pages import get_singleton_page
+
 from auth.mixins import CustomerProfileRequiredMixin
 
 from payment_transactions.models import PaymentTransaction
@@ -56,7 +58,7 @@ class OrdersHistoryPage(CustomerProfileRequiredMixin, Page):
         )
 
         context["orders"] = orders
-        context["order_detail_page"] = OrderDetailPage.objects.live().first()
+        context["order_detail_page"] = get_singleton_page(OrderDetailPage)
 
         return context
 
@@ -111,7 +113,7 @@ class TransactionsHistoryPage(CustomerProfileRequiredMixin, Page):
         ).select_related('order')
 
         context["transactions"] = transactions
-        context["order_detail_page"] = OrderDetailPage.objects.live().first()
+        context["order_detail_page"] = get_singleton_page(OrderDetailPage)
 
         return context
 
@@ -1,5 +1,7 @@
 from django import template
 
+from core.pages import get_singleton_page
+
 from profiles.models import (
     OrdersHistoryPage,
     TransactionsHistoryPage,
@@ -17,9 +19,9 @@ def profile_menu_links(context):
 
     return {
         'current_page': current_page,
-        'orders_history_page': OrdersHistoryPage.objects.live().first(),
-        'transactions_history_page': TransactionsHistoryPage.objects.live().first(),
-        'contact_information_page': ContactInformationPage.objects.live().first(),
-        'change_password_page': ChangePasswordPage.objects.live().first(),
-        'address_page': AddressPage.objects.live().first()
+        'orders_history_page': get_singleton_page(OrdersHistoryPage),
+        'transactions_history_page': get_singleton_page(TransactionsHistoryPage),
+        'contact_information_page': get_singleton_page(ContactInformationPage),
+        'change_password_page': get_singleton_page(ChangePasswordPage),
+        'address_page': get_singleton_page(AddressPage)
     }
\ No newline at end of file
@@ -1,8 +1,19 @@
+from django.conf import settings
+from django.core.cache import cache
 from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.http import HttpResponse
+from django.template.loader import render_to_string
 from django.template.response import TemplateResponse
+from django.utils import translation
 
 from wagtail.models import Page
 
+from core.pages import get_singleton_page
+
+from products.models import Product, ProductPage
+
+from shop.cache import get_catalog_version
+
 # To enable logging of search queries for use with the "Promoted search results" module
 # <https://docs.wagtail.org/en/stable/reference/contrib/searchpromotions.html>
 # uncomment the following line and the lines indicated in the search function
@@ -10,6 +21,80 @@ from wagtail.models import Page
 
 # from wagtail.contrib.search_promotions.models import Query
 
+PRODUCTS_PER_PAGE = 12
+PAGES_LIMIT = 10
+AUTOCOMPLETE_MIN_LENGTH = 2
+AUTOCOMPLETE_MAX_LENGTH = 64
+
 
 def search(request):
-    pass
+    search_query = request.GET.get("query", "").strip()
+    page = request.GET.get("page", 1)
+
+    # Search
+    if search_query:
+        # Products are matched against the GIN-indexed search vector of the
+        # active language (see ProductQuerySet.search).
+        product_results = Product.objects.search(search_query).prefetch_related("images", "features")
+        page_results = Page.objects.live().search(search_query)[:PAGES_LIMIT]
+
+        # To log this query for use with the "Promoted search results" module:
+
+        # query = Query.get(search_query)
+        # query.add_hit()
+
+    else:
+        product_results = Product.objects.none()
+        page_results = Page.objects.none()
+
+    # Pagination
+    paginator = Paginator(product_results, PRODUCTS_PER_PAGE)
+    try:
+        product_results = paginator.page(page)
+    except PageNotAnInteger:
+        product_results = paginator.page(1)
+    except EmptyPage:
+        product_results = paginator.page(paginator.num_pages)
+
+    return TemplateResponse(
+        request,
+        "search.html",
+        {
+            "search_query": search_query,
+            "search_results": product_results,
+            "page_results": page_results,
+            "product_page": get_singleton_page(ProductPage),
+        },
+    )
+
+
+def autocomplete(request):
+    search_query = " ".join(request.GET.get("query", "").split())[:AUTOCOMPLETE_MAX_LENGTH].lower()
+
+    if len(search_query) < AUTOCOMPLETE_MIN_LENGTH:
+        return HttpResponse("")
+
+    # Keyed by the catalog version, so product changes invalidate hot prefixes
+    # together with the catalog fragments.
+    cache_key = f"search:autocomplete:{get_catalog_version()}:{translation.get_language()}:{search_query}"
+    content = cache.get(cache_key)
+
+    if content is None:
+        products = Product.objects.autocomplete(
+            search_query,
+            limit=settings.SEARCH_AUTOCOMPLETE_LIMIT,
+            threshold=settings.SEARCH_AUTOCOMPLETE_SIMILARITY,
+        )
+
+        content = render_to_string(
+            "includes/search/autocomplete.html",
+            {
+                "search_query": search_query,
+                "products": products,
+                "product_page": get_singleton_page(ProductPage),
+            },
+            request,
+        )
+        cache.set(cache_key, content, settings.SEARCH_AUTOCOMPLETE_CACHE_TIMEOUT)
+
+    return HttpResponse(content)
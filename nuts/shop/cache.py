@@ -0,0 +1,34 @@
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.utils import translation
+
+CATALOG_VERSION_KEY = 'shop:catalog:version'
+
+
+def get_catalog_version():
+    return cache.get_or_set(CATALOG_VERSION_KEY, 1, timeout=None)
+
+
+def bump_catalog_version():
+    """
+    Invalidates every cached catalog fragment at once: entries are keyed by
+    version, so old ones are never read again and expire on their own.
+    """
+    try:
+        cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        cache.set(CATALOG_VERSION_KEY, 2, timeout=None)
+
+
+def get_catalog_cache_key(ordering, feature_ids, weight_range, after):
+    """
+    Key of a rendered catalog page, built from the validated filters and the
+    decoded cursor (after: sort key values of the last product before the
+    page), so that unknown or malformed parameters can't add new entries.
+    """
+    params = json.dumps([list(ordering), list(feature_ids), weight_range and list(weight_range), after])
+    digest = hashlib.md5(params.encode()).hexdigest()
+
+    return f'shop:catalog:{get_catalog_version()}:{translation.get_language()}:{digest}'
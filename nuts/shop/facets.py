@@ -0,0 +1,78 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+from products.models import Product
+
+from shop.cache import get_catalog_version
+from shop.forms import ProductFilterForm
+
+
+def get_weight_ranges():
+    for value, _ in ProductFilterForm.WEIGHT_CHOICES:
+        if value:
+            w_min, w_max = value.split('-')
+            yield value, int(w_min), int(w_max)
+
+
+def compute_catalog_facets(feature_ids=()):
+    """
+    Product counts for every feature × weight range combination from one
+    GROUPING SETS query. Keys are (feature_id, weight_range) where None
+    means "any feature" and '' means "any weight".
+
+    With feature_ids selected only the products having all of them are
+    counted, so a feature's count is what selecting it as well would show.
+
+    Rows are grouped by exact weight and summed into ranges here, because
+    the form's ranges share their boundaries (50 is in both 0-50 and 50-100).
+    """
+    through = Product.features.through
+    where, params = '', ()
+
+    if feature_ids:
+        sql, params = Product.objects.has_all_features(feature_ids).values('id').query.sql_with_params()
+        where = f'WHERE product.id IN ({sql})'
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT link.productfeature_id, product.weight, COUNT(DISTINCT product.id), GROUPING(link.productfeature_id)
+            FROM {Product._meta.db_table} product
+            LEFT JOIN {through._meta.db_table} link ON link.product_id = product.id
+            {where}
+            GROUP BY GROUPING SETS ((link.productfeature_id, product.weight), (product.weight))
+            """,
+            params,
+        )
+        rows = cursor.fetchall()
+
+    facets = {}
+
+    for feature_id, weight, count, any_feature in rows:
+        if any_feature:
+            feature_id = None
+        elif feature_id is None:
+            # Products without features only matter for the "any feature" counts.
+            continue
+
+        facets[(feature_id, '')] = facets.get((feature_id, ''), 0) + count
+
+        for value, w_min, w_max in get_weight_ranges():
+            if w_min <= weight <= w_max:
+                facets[(feature_id, value)] = facets.get((feature_id, value), 0) + count
+
+    return facets
+
+
+def get_catalog_facets(feature_ids=()):
+    # Counts don't depend on the language, only on the catalog contents.
+    feature_ids = sorted(feature_ids)
+    cache_key = f'shop:facets:{get_catalog_version()}:{",".join(map(str, feature_ids))}'
+    facets = cache.get(cache_key)
+
+    if facets is None:
+        facets = compute_catalog_facets(feature_ids)
+        cache.set(cache_key, facets, settings.SHOP_CATALOG_CACHE_TIMEOUT)
+
+    return facets
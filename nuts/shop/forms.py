@@ -2,11 +2,61 @@ from django import forms
 
 from products.models import ProductFeature
 
+
+def get_selected_feature_ids(data):
+    """
+    Valid ids from the (repeatable) feature parameter, sorted and unique.
+    """
+    values = data.getlist('feature') if hasattr(data, 'getlist') else [data.get('feature')]
+    return sorted({int(value) for value in values if str(value or '').isdigit()})
+
+
+class FacetOptionsMixin:
+    """
+    Disables every non-empty option missing from enabled_values, unless it
+    is selected. enabled_values=None leaves all options enabled.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.enabled_values = None
+
+    def create_option(self, name, value, label, selected, *args, **kwargs):
+        option = super().create_option(name, value, label, selected, *args, **kwargs)
+
+        if self.enabled_values is not None and not selected and str(value) and str(value) not in self.enabled_values:
+            option['attrs']['disabled'] = True
+
+        return option
+
+
+class FacetSelect(FacetOptionsMixin, forms.Select):
+    pass
+
+
+class FacetSelectMultiple(FacetOptionsMixin, forms.SelectMultiple):
+    """
+    Starts with an empty placeholder option, which the storefront select
+    script shows while nothing is chosen and uses to clear the selection.
+    """
+
+    def __init__(self, *args, placeholder='', **kwargs):
+        super().__init__(*args, **kwargs)
+        self.placeholder = placeholder
+
+    def optgroups(self, name, value, attrs=None):
+        placeholder = self.create_option(name, '', self.placeholder, False, 0, attrs=attrs)
+        return [(None, [placeholder], 0)] + [
+            (group_name, options, index + 1) for group_name, options, index in super().optgroups(name, value, attrs)
+        ]
+
+
 class ProductFilterForm(forms.Form):
-    feature = forms.ModelChoiceField(
+    # Several features narrow the catalog down to products having all of them.
+    feature = forms.ModelMultipleChoiceField(
         queryset=ProductFeature.objects.all(),
-        empty_label="Вкус",
         required=False,
+        widget=FacetSelectMultiple(placeholder="Вкус"),
     )
 
     WEIGHT_CHOICES = [
@@ -19,7 +69,8 @@ class ProductFilterForm(forms.Form):
     ]
     weight_range = forms.ChoiceField(
         choices=WEIGHT_CHOICES,
-        required=False
+        required=False,
+        widget=FacetSelect(),
     )
 
 
@@ -27,4 +78,41 @@ class ProductFilterForm(forms.Form):
         choices=[('asc', 'Ascending'), ('desc', 'Descending')],
         required=False,
         widget=forms.HiddenInput()
-    )
\ No newline at end of file
+    )
+
+    def __init__(self, *args, facets=None, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        if facets is not None:
+            self.apply_facets(facets)
+
+    def apply_facets(self, facets):
+        """
+        Adds product counts to the feature and weight options and disables
+        the empty ones. facets comes from shop.facets.get_catalog_facets for
+        the selected features, so a feature option counts the products that
+        also have it, and a weight option counts the current selection.
+        """
+        selected_weight = self.data.get('weight_range') or ''
+
+        if selected_weight not in dict(self.WEIGHT_CHOICES):
+            selected_weight = ''
+
+        feature_field = self.fields['feature']
+        feature_field.label_from_instance = (
+            lambda feature: f"{feature.name} ({facets.get((feature.pk, selected_weight), 0)})"
+        )
+        feature_field.widget.enabled_values = {
+            str(feature_id) for (feature_id, weight), count in facets.items()
+            if feature_id is not None and weight == selected_weight and count
+        }
+
+        weight_field = self.fields['weight_range']
+        weight_field.choices = [
+            (value, f"{label} ({facets.get((None, value), 0)})" if value else label)
+            for value, label in self.WEIGHT_CHOICES
+        ]
+        weight_field.widget.enabled_values = {
+            weight for (feature_id, weight), count in facets.items()
+            if feature_id is None and weight and count
+        }
@@ -0,0 +1,256 @@
+import threading
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.dateparse import parse_datetime
+
+from products.models import Product
+
+from shop.cache import get_catalog_version
+from shop.pagination import CursorPage, CursorPaginator
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+EPOCH = parse_datetime('1970-01-01T00:00:00+00:00')
+
+
+def to_cents(value):
+    return int((Decimal(value) * 100).to_integral_value())
+
+
+def to_microseconds(value):
+    if isinstance(value, str):
+        value = parse_datetime(value)
+
+    delta = value.astimezone(dt_timezone.utc) - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+class CatalogIndex:
+    """
+    Process-local columnar copy of the catalog (id, actual price, weight,
+    is_new, created_at and a feature bitmask) used to filter, sort and
+    paginate without touching the database.
+
+    Product signals in this process update the affected rows in place
+    (see shop.signals). Changes made by other processes are picked up
+    through the shared catalog version, which triggers a full rebuild.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = None
+        self.columns = None
+        self.feature_positions = {}
+
+    def fetch(self, product_ids=None):
+        queryset = Product.objects.order_by()
+        links = Product.features.through.objects.all()
+
+        if product_ids is not None:
+            queryset = queryset.filter(id__in=product_ids)
+            links = links.filter(product_id__in=product_ids)
+
+        rows = list(queryset.values_list('id', 'actual_price', 'weight', 'is_new', 'created_at'))
+        features = {}
+
+        for product_id, feature_id in links.values_list('product_id', 'productfeature_id'):
+            features.setdefault(product_id, []).append(feature_id)
+
+        return rows, features
+
+    def make_columns(self, rows, features):
+        words = max(1, (len(self.feature_positions) + 63) // 64)
+
+        columns = {
+            'id': np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows)),
+            'actual_price': np.fromiter((to_cents(row[1]) for row in rows), dtype=np.int64, count=len(rows)),
+            'weight': np.fromiter((row[2] for row in rows), dtype=np.int32, count=len(rows)),
+            'is_new': np.fromiter((row[3] for row in rows), dtype=np.bool_, count=len(rows)),
+            'created_at': np.fromiter((to_microseconds(row[4]) for row in rows), dtype=np.int64, count=len(rows)),
+            'features': np.zeros((len(rows), words), dtype=np.uint64),
+        }
+
+        for i, row in enumerate(rows):
+            for feature_id in features.get(row[0], ()):
+                position = self.feature_positions[feature_id]
+                columns['features'][i, position // 64] |= np.uint64(1 << (position % 64))
+
+        return columns
+
+    def assign_feature_positions(self, features):
+        added = False
+
+        for feature_ids in features.values():
+            for feature_id in feature_ids:
+                if feature_id not in self.feature_positions:
+                    self.feature_positions[feature_id] = len(self.feature_positions)
+                    added = True
+
+        return added
+
+    def rebuild(self):
+        version = get_catalog_version()
+        rows, features = self.fetch()
+
+        with self.lock:
+            self.feature_positions = {}
+            self.assign_feature_positions(features)
+            self.columns = self.make_columns(rows, features)
+            self.version = version
+
+    def update(self, product_ids):
+        """
+        Reloads the given products (dropping deleted ones) without a full
+        rebuild. Falls back to rebuild() when the bitmask has to grow.
+        """
+        if self.columns is None:
+            return
+
+        product_ids = list(product_ids)
+        rows, features = self.fetch(product_ids)
+
+        with self.lock:
+            words = self.columns['features'].shape[1]
+            self.assign_feature_positions(features)
+
+            if len(self.feature_positions) > words * 64:
+                self.columns = None
+
+            else:
+                fresh = self.make_columns(rows, features)
+                keep = ~np.isin(self.columns['id'], np.array(product_ids, dtype=np.int64))
+
+                self.columns = {
+                    name: np.concatenate([column[keep], fresh[name]])
+                    for name, column in self.columns.items()
+                }
+
+            self.version = get_catalog_version()
+
+        if self.columns is None:
+            self.rebuild()
+
+    def ensure_fresh(self):
+        if self.columns is None or self.version != get_catalog_version():
+            self.rebuild()
+
+    def query(self, ordering, limit, feature_ids=(), weight_range=None, after=None):
+        """
+        Ids of up to limit products matching the filters (having all of
+        feature_ids and weighing within weight_range), in the given
+        ordering ((sort field, 'id'), one direction) and after the keyset
+        position `after` (sort value, id), as decoded from a cursor.
+        """
+        self.ensure_fresh()
+        columns = self.columns
+
+        sort_field = ordering[0].lstrip('-')
+        descending = ordering[0].startswith('-')
+
+        ids = columns['id']
+        key = columns[sort_field]
+        mask = np.ones(len(ids), dtype=np.bool_)
+
+        for feature_id in feature_ids:
+            position = self.feature_positions.get(feature_id)
+
+            if position is None:
+                return []
+
+            bit = np.uint64(1 << (position % 64))
+            mask &= (columns['features'][:, position // 64] & bit) != 0
+
+        if weight_range is not None:
+            w_min, w_max = weight_range
+            mask &= (columns['weight'] >= w_min) & (columns['weight'] <= w_max)
+
+        if after is not None:
+            after_key, after_id = after
+
+            if descending:
+                mask &= (key < after_key) | ((key == after_key) & (ids < after_id))
+            else:
+                mask &= (key > after_key) | ((key == after_key) & (ids > after_id))
+
+        positions = np.flatnonzero(mask)
+        order = np.lexsort((ids[positions], key[positions]))
+
+        if descending:
+            order = order[::-1]
+
+        return ids[positions[order[:limit]]].tolist()
+
+
+class IndexCursorPaginator(CursorPaginator):
+    """
+    CursorPaginator that finds the page ids in the CatalogIndex and only
+    loads those products from the database. Cursors are interchangeable
+    with the ORM paginator.
+    """
+
+    converters = {
+        'actual_price': to_cents,
+        'created_at': to_microseconds,
+    }
+
+    def __init__(self, index, queryset, ordering, page_size, feature_ids=(), weight_range=None):
+        super().__init__(queryset, ordering, page_size)
+        self.index = index
+        self.ordering = ordering
+        self.feature_ids = feature_ids
+        self.weight_range = weight_range
+
+    def get_page(self, cursor=None):
+        values = self.decode_cursor(cursor) if cursor else None
+        after = None
+
+        if values is not None:
+            try:
+                after = (self.converters[self.fields[0]](values[0]), int(values[1]))
+            except (ArithmeticError, TypeError, ValueError):
+                after = None
+
+        ids = self.index.query(
+            self.ordering,
+            self.page_size + 1,
+            feature_ids=self.feature_ids,
+            weight_range=self.weight_range,
+            after=after,
+        )
+
+        products = self.queryset.filter(id__in=ids[:self.page_size]).in_bulk()
+        object_list = [products[product_id] for product_id in ids[:self.page_size] if product_id in products]
+
+        next_cursor = None
+
+        if len(ids) > self.page_size and object_list:
+            next_cursor = self.encode_cursor(object_list[-1])
+
+        return CursorPage(object_list, next_cursor)
+
+
+catalog_index = None
+
+
+def get_catalog_index():
+    global catalog_index
+
+    if np is None:
+        raise ImproperlyConfigured("SHOP_CATALOG_INDEX requires NumPy to be installed.")
+
+    if catalog_index is None:
+        catalog_index = CatalogIndex()
+
+    return catalog_index
+
+
+def update_catalog_index(product_ids):
+    # Only touches an index that this process has already built.
+    if settings.SHOP_CATALOG_INDEX and catalog_index is not None:
+        catalog_index.update(product_ids)
@@ -0,0 +1,80 @@
+import time
+from itertools import product as combinations
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from products.models import ProductFeature
+
+from shop.forms import ProductFilterForm
+from shop.index import get_catalog_index
+from shop.views import ShopCatalogView
+
+ORDERINGS = (
+    ('-created_at', '-id'),
+    ('actual_price', 'id'),
+    ('-actual_price', '-id'),
+)
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает выборку страниц каталога через ORM и через индекс каталога в памяти'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--page-size', type=int, default=12)
+        parser.add_argument('--pages', type=int, default=3, help='Сколько страниц пролистывать для каждой комбинации')
+
+    def handle(self, *args, **options):
+        try:
+            index = get_catalog_index()
+        except Exception as e:
+            raise CommandError(e)
+
+        started = time.perf_counter()
+        index.rebuild()
+        self.stdout.write(f'Построение индекса: {(time.perf_counter() - started) * 1000:.1f} мс')
+
+        weight_ranges = [None] + [
+            tuple(map(int, value.split('-'))) for value, _ in ProductFilterForm.WEIGHT_CHOICES if value
+        ]
+        feature_ids = [None] + list(ProductFeature.objects.values_list('id', flat=True))
+        cases = list(combinations(ORDERINGS, feature_ids, weight_ranges))
+
+        view = ShopCatalogView()
+        queries = []
+
+        def count_queries(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        for use_index in (False, True):
+            queries.clear()
+
+            with override_settings(SHOP_CATALOG_INDEX=use_index, SHOP_CATALOG_PAGE_SIZE=options['page_size']), \
+                    connection.execute_wrapper(count_queries):
+                pages = 0
+                started = time.perf_counter()
+
+                for _ in range(options['repeat']):
+                    for ordering, feature_id, weight_range in cases:
+                        cursor = None
+
+                        for _ in range(options['pages']):
+                            page = view.get_paginator(
+                                ordering, (feature_id,) if feature_id else (), weight_range
+                            ).get_page(cursor)
+                            pages += 1
+
+                            if not page.has_next:
+                                break
+
+                            cursor = page.next_cursor
+
+                elapsed = time.perf_counter() - started
+
+            self.stdout.write(
+                f'{"Индекс" if use_index else "ORM":>6}: {pages} страниц, '
+                f'{elapsed / pages * 1000:.2f} мс на страницу, {len(queries) / pages:.1f} запросов на страницу'
+            )
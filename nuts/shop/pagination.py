@@ -0,0 +1,81 @@
+from django.core import signing
+from django.db.models import Q
+
+
+class CursorPage:
+    def __init__(self, object_list, next_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class CursorPaginator:
+    """
+    Keyset pagination: the cursor holds the sort key values of the last row
+    shown and the next page is the rows after it, so there is no COUNT and
+    no OFFSET. The ordering must end with a unique field (e.g. id) and use
+    one direction for all fields.
+    """
+
+    salt = 'shop.pagination.cursor'
+
+    def __init__(self, queryset, ordering, page_size):
+        self.queryset = queryset.order_by(*ordering)
+        self.fields = [field.lstrip('-') for field in ordering]
+        self.descending = ordering[0].startswith('-')
+        self.page_size = page_size
+
+    def encode_cursor(self, obj):
+        values = [getattr(obj, field) for field in self.fields]
+        return signing.dumps([str(value) for value in values], salt=self.salt, compress=True)
+
+    def decode_cursor(self, cursor):
+        try:
+            values = signing.loads(cursor, salt=self.salt)
+        except signing.BadSignature:
+            return None
+
+        if not isinstance(values, list) or len(values) != len(self.fields):
+            return None
+
+        return values
+
+    def after(self, values):
+        gt = 'lt' if self.descending else 'gt'
+        gte = 'lte' if self.descending else 'gte'
+
+        # (a, b) > (x, y) written as a >= x AND (a > x OR (a = x AND b > y)),
+        # so the leading condition can drive an index range scan.
+        condition = Q()
+        equal = {}
+
+        for field, value in zip(self.fields, values):
+            condition |= Q(**equal, **{f'{field}__{gt}': value})
+            equal[field] = value
+
+        return Q(**{f'{self.fields[0]}__{gte}': values[0]}) & condition
+
+    def get_page(self, cursor=None):
+        queryset = self.queryset
+        values = self.decode_cursor(cursor) if cursor else None
+
+        if values is not None:
+            queryset = queryset.filter(self.after(values))
+
+        object_list = list(queryset[:self.page_size + 1])
+        next_cursor = None
+
+        if len(object_list) > self.page_size:
+            object_list = object_list[:self.page_size]
+            next_cursor = self.encode_cursor(object_list[-1])
+
+        return CursorPage(object_list, next_cursor)
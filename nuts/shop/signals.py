@@ -0,0 +1,58 @@
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from wagtail.signals import page_published, page_unpublished
+
+from products.models import Product, ProductFeature, ProductImage, ProductPage
+from products.signals import products_imported
+
+from shop.cache import bump_catalog_version
+from shop.index import update_catalog_index
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_catalog_on_product_change(sender, instance, **kwargs):
+    bump_catalog_version()
+    update_catalog_index([instance.pk])
+
+
+@receiver(products_imported)
+def invalidate_catalog_on_import(sender, product_ids, **kwargs):
+    bump_catalog_version()
+    update_catalog_index(product_ids)
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def invalidate_catalog_on_image_change(sender, instance, **kwargs):
+    bump_catalog_version()
+    update_catalog_index([instance.product_id])
+
+
+@receiver(post_save, sender=ProductFeature)
+@receiver(post_delete, sender=ProductFeature)
+def invalidate_catalog_on_feature_change(sender, **kwargs):
+    # Deleting a feature drops its links without m2m_changed, so the catalog
+    # index is left to rebuild itself from the new version.
+    bump_catalog_version()
+
+
+@receiver(m2m_changed, sender=Product.features.through)
+def invalidate_catalog_on_features_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    bump_catalog_version()
+
+    if not reverse:
+        update_catalog_index([instance.pk])
+    elif pk_set:
+        update_catalog_index(pk_set)
+
+
+# Cards link to the product page, so its URL is part of the fragment.
+@receiver(page_published, sender=ProductPage)
+@receiver(page_unpublished, sender=ProductPage)
+def invalidate_catalog_on_product_page_change(sender, **kwargs):
+    bump_catalog_version()
@@ -1,3 +1,25 @@
+from unittest import mock
+
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+
+
+class CatalogCacheTests(TestCase):
+    def cached_keys(self, query):
+        with mock.patch.object(cache, 'set', wraps=cache.set) as cache_set:
+            response = self.client.get(reverse('shop:catalog') + query)
+
+        self.assertEqual(response.status_code, 200)
+        return [call.args[0] for call in cache_set.call_args_list if call.args[0].startswith('shop:catalog:')]
+
+    def test_only_validated_filters_make_cache_entries(self):
+        cache.clear()
+        keys = self.cached_keys('?sort_price=asc')
+
+        self.assertEqual(len(keys), 1)
+        # Unknown parameters don't change the key, so the entry is reused.
+        self.assertEqual(self.cached_keys('?sort_price=asc&utm_source=mail'), [])
 
-# Create your tests here.
+        for query in ('?cursor=junk', '?feature=999999', '?weight_range=1-2', '?sort_price=random'):
+            self.assertEqual(self.cached_keys(query), [], query)
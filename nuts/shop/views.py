@@ -1,51 +1,89 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
 from django.views import View
-from django.shortcuts import render
-from django.core.paginator import Paginator
-from django.db.models import Case, When, F, DecimalField
+from django.template.loader import render_to_string
+from core.pages import get_singleton_page
 from products.models import Product, ProductPage
 
-from .forms import ProductFilterForm
+from .cache import get_catalog_cache_key
+from .facets import get_catalog_facets
+from .index import IndexCursorPaginator, get_catalog_index
+from .forms import ProductFilterForm, get_selected_feature_ids
+from .pagination import CursorPaginator
 
 class ShopCatalogView(View):
     def get(self, request, *args, **kwargs):
+        form = ProductFilterForm(request.GET)
+
+        # Invalid filters or a cursor that doesn't decode are rendered
+        # (as the first page) but not cached.
+        if not form.is_valid():
+            return HttpResponse(self.render_catalog(request, form))
+
+        ordering, feature_ids, weight_range = self.get_filters(form)
+        paginator = self.get_paginator(ordering, feature_ids, weight_range)
+        cursor = request.GET.get('cursor')
+        after = paginator.decode_cursor(cursor) if cursor else None
+
+        if cursor and after is None:
+            return HttpResponse(self.render_catalog(request, form, paginator))
+
+        cache_key = get_catalog_cache_key(ordering, feature_ids, weight_range, after)
+        content = cache.get(cache_key)
+
+        if content is None:
+            content = self.render_catalog(request, form, paginator)
+            cache.set(cache_key, content, settings.SHOP_CATALOG_CACHE_TIMEOUT)
+
+        return HttpResponse(content)
+
+    def get_filters(self, form):
+        ordering = ('-created_at', '-id')
+        feature_ids = sorted(feature.pk for feature in form.cleaned_data.get('feature') or ())
+        weight_range = None
+
+        weight = form.cleaned_data.get('weight_range')
+
+        if weight:
+            w_min, w_max = weight.split('-')
+            weight_range = (int(w_min), int(w_max))
+
+        sort = form.cleaned_data.get('sort_price')
+
+        if sort == 'asc':
+            ordering = ('actual_price', 'id')
+        elif sort == 'desc':
+            ordering = ('-actual_price', '-id')
+
+        return ordering, feature_ids, weight_range
+
+    def get_paginator(self, ordering, feature_ids=(), weight_range=None):
         queryset = Product.objects.all().prefetch_related('images', 'features')
+        page_size = settings.SHOP_CATALOG_PAGE_SIZE
 
-        form = ProductFilterForm(request.GET)
-        if form.is_valid():
-            feature = form.cleaned_data.get('feature')
-
-            if feature:
-                queryset = queryset.filter(features=feature)
-
-            weight_range = form.cleaned_data.get('weight_range')
-
-            if weight_range:
-                try:
-                    w_min, w_max = weight_range.split('-')
-                    queryset = queryset.filter(weight__gte=w_min, weight__lte=w_max)
-                except ValueError:
-                    pass
-
-            queryset = queryset.annotate(
-                actual_price=Case(
-                    When(discounted_price__isnull=False, then=F('discounted_price')),
-                    default=F('price'),
-                    output_field=DecimalField(),
-                )
+        if settings.SHOP_CATALOG_INDEX:
+            return IndexCursorPaginator(
+                get_catalog_index(), queryset, ordering, page_size,
+                feature_ids=feature_ids, weight_range=weight_range
             )
 
-            sort = form.cleaned_data.get('sort_price')
+        if feature_ids:
+            queryset = queryset.has_all_features(feature_ids)
+
+        if weight_range:
+            queryset = queryset.filter(weight__gte=weight_range[0], weight__lte=weight_range[1])
+
+        return CursorPaginator(queryset, ordering, page_size)
 
-            if sort == 'asc':
-                queryset = queryset.order_by('actual_price')
-            elif sort == 'desc':
-                queryset = queryset.order_by('-actual_price')
+    def render_catalog(self, request, form, paginator=None):
+        if paginator is None:
+            paginator = self.get_paginator(('-created_at', '-id'))
 
-        paginator = Paginator(queryset, 1)
-        page_number = request.GET.get('page')
-        page_obj = paginator.get_page(page_number)
+        form.apply_facets(get_catalog_facets(get_selected_feature_ids(request.GET)))
+        page_obj = paginator.get_page(request.GET.get('cursor'))
 
-        product_page = ProductPage.objects.live().first()
+        product_page = get_singleton_page(ProductPage)
 
         context = {
             'products': page_obj,
@@ -54,4 +92,4 @@ class ShopCatalogView(View):
             'filter_form': form
         }
 
-        return render(request, "includes/shop/cards.html", context)
\ No newline at end of file
+        return render_to_string("includes/shop/cards.html", context, request)